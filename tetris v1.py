@@ -1,20 +1,63 @@
 
+import time
+# Startzeitpunkt für --startup-time (vor allen übrigen Imports)
+STARTUP_START = time.perf_counter()
+
 import pygame
-import random
 import os
-
-import tkinter as tk
-from tkinter import simpledialog
+import sys
+import argparse
+import csv
+import json
+import struct
+import threading
+import zlib
+from collections import OrderedDict, deque
+
+from tetris_engine import (SHAPES, COLORS, PALETTE, ROTATIONS, GRID_PRESETS, TICK_MS, TetrisEngine, TickAccumulator,
+                           parse_size, SOFT_DROP, RELEASE_SOFT_DROP, ROTATE, HARD_DROP, HOLD)
+from tetris_replay import Replay, ReplayRecorder, play_fast, matches
+from tetris_ai import AutoPlayer
+from tetris_input import InputHandler, LEFT, RIGHT
+from tetris_leaderboard import LeaderboardStore
+from tetris_storage import BackgroundWriter
+from tetris_savestate import SaveState, Rewind
+
+STARTUP_IMPORTED = time.perf_counter()
 
 # --- CONFIG ---
 
 # Initialwerte, werden im Dialog überschrieben
 SCREEN_WIDTH, SCREEN_HEIGHT = 300, 600
 GRID_SIZE = 30
+# Zellgröße in px: setup_game_window verkleinert GRID_SIZE bis MIN_GRID_SIZE, damit das Feld auf
+# den Bildschirm passt; reicht das nicht, zeigt das Fenster einen scrollenden Ausschnitt (Viewport)
+MAX_GRID_SIZE = GRID_SIZE
+MIN_GRID_SIZE = 10
+# Platz für Fensterrahmen und Taskleiste; Desktopgröße, falls SDL keine liefert
+WINDOW_MARGIN = (40, 100)
+FALLBACK_DESKTOP = (1280, 800)
+# Mindesthöhe des Spielfensters (Sidebar und Levelauswahl)
+MIN_WINDOW_HEIGHT = 440
+# so viele Zellen hält der Viewport zwischen aktivem Stein und Bildrand frei
+VIEW_MARGIN = 4
 FPS = 60
-
-# Tastatureingabe Debounce in ms (ignoriert schnelle Doppel-Registrierungen)
+# Rendering: 'capped' (FPS), 'vsync' (Bildwiederholrate des Monitors) oder 'uncapped';
+# die Spiellogik läuft unabhängig davon in festen Schritten von TICK_MS
+RENDER_MODE = 'capped'
+RENDER_MODES = ('capped', 'vsync', 'uncapped')
+# Framerate, solange das Fenster keinen Fokus hat (nur wenn der Autoplayer spielt; sonst wird pausiert)
+UNFOCUSED_FPS = 10
+
+# Tastatureingabe Debounce in ms (ignoriert schnelle Doppel-Registrierungen);
+# gilt für die Umschalttasten, Spieltasten werden nicht entprellt (einzelne Tasten: KEY_DEBOUNCE_MS)
 DEBOUNCE_MS = 150
+TOGGLE_KEYS = (pygame.K_p, pygame.K_F3)
+KEY_DEBOUNCE_MS = {}
+
+# DAS (Verzögerung bis zur Wiederholung) und ARR (Wiederholrate) je Richtung in ms; ARR 0 = sofort an die Wand
+DAS_MS = {LEFT: 80, RIGHT: 80}
+ARR_MS = {LEFT: 80, RIGHT: 80}
 
 # Start-Defaults für COLUMNS und ROWS (werden in main überschrieben)
 COLUMNS = SCREEN_WIDTH // GRID_SIZE
@@ -22,25 +65,29 @@ ROWS = SCREEN_HEIGHT // GRID_SIZE
 
 # Sidebar-Breite (wird in main angepasst)
 SIDEBAR_WIDTH = 150
+# Versus: Breite der Gegneransicht rechts neben der Sidebar und deren Zellgröße (0 = keine)
+OPPONENT_WIDTH = 0
+OPPONENT_CELL = 0
+# Anteil der Fensterbreite für die Gegneransicht
+OPPONENT_SHARE = 3
 
 # Ghost mode global switch (toggle im Hauptmenü)
 GHOST_ENABLED = False
 # Ghost style: 'filled' or 'outline'
 GHOST_STYLE = 'filled'  # options: 'filled', 'outline'
+# Autoplayer spielt (toggle im Hauptmenü)
+AI_ENABLED = False
 
 # Menu fixed size
 MENU_WIDTH = 600
 MENU_HEIGHT = 600
-
-# Grid presets: (cols, rows)
-GRID_PRESETS = [
-    (10, 20),  # standard
-    (10, 40),
-    (20, 40),
-    (40, 40)
-]
+# Feldgrößen im Menü: die Presets plus eine eigene Größe (--size)
+BOARD_SIZES = list(GRID_PRESETS)
 
 def get_window_size():
+    # tkinter nur für diesen Dialog laden (der Import kostet spürbar Startzeit)
+    import tkinter as tk
+    from tkinter import simpledialog
     root = tk.Tk()
     root.withdraw()
     # Neue Mindestwerte (vom Nutzer gewünscht)
@@ -73,36 +120,86 @@ def get_window_size():
 
     return width, height
 
-SHAPES = [
-    [[1, 1, 1, 1]],  # I
-    [[1, 1, 1], [0, 1, 0]],  # T
-    [[1, 1, 0], [0, 1, 1]],  # S
-    [[0, 1, 1], [1, 1, 0]],  # Z
-    [[1, 1, 1], [1, 0, 0]],  # L
-    [[1, 1, 1], [0, 0, 1]],  # J
-    [[1, 1], [1, 1]]  # O
-]
-COLORS = [
-    (0, 255, 255),  # I - Cyan
-    (128, 0, 128),  # T - Purple
-    (0, 255, 0),    # S - Green
-    (255, 0, 0),    # Z - Red
-    (255, 165, 0),  # L - Orange
-    (0, 0, 255),    # J - Blue
-    (255, 255, 0)   # O - Yellow
-]
-
+# Leaderboard-Datenbank; die alte Textdatei wird beim ersten Start einmalig übernommen
+LEADERBOARD_DB = "leaderboard.db"
 LEADERBOARD_FILE = "leaderboard.txt"
-
-class Tetromino:
-    def __init__(self, shape, color):
-        self.shape = shape
-        self.color = color
-        self.x = COLUMNS // 2 - len(shape[0]) // 2
-        self.y = 0
-
-    def rotate(self):
-        self.shape = [list(row) for row in zip(*self.shape[::-1])]
+LEADERBOARD_SIZE = 5
+# Game-Over-Bildschirm so lange zeigen (eine Taste überspringt)
+GAME_OVER_MS = 1500
+# vom Writer-Thread gepostet, sobald ein Leaderboard-Eintrag gespeichert ist
+LEADERBOARD_UPDATED = pygame.event.custom_type()
+# jede Partie wird hierhin aufgezeichnet (abspielen mit --replay)
+LAST_REPLAY_FILE = "last_replay.tetr"
+# F5 im Spiel legt die Partie hier ab und kehrt ins Menü zurück; R im Menü setzt sie fort
+SAVE_FILE = "suspended.tsav"
+SUSPEND_KEY = pygame.K_F5
+# gedrückt halten: Spiel läuft rückwärts (bis zu REWIND_SECONDS aus tetris_savestate)
+REWIND_KEY = pygame.K_r
+
+# Schriftart aller Screens; Fonts werden einmal geladen (load_fonts) und wiederverwendet
+FONT_NAME = "comicsans"
+FONT_SIZES = (18, 24, 28, 30, 48)
+# maximale Anzahl gecachter Text-Surfaces (älteste werden zuerst verworfen)
+LABEL_CACHE_SIZE = 256
+
+# Profiling-Overlay (F3 im Spiel): Frames im gleitenden Fenster für p50/p99, Aktualisierung des Texts in ms
+PROFILE_OVERLAY = False
+PROFILE_WINDOW = 240
+PROFILE_REFRESH_MS = 250
+# optional: jeden Frame als CSV/JSONL-Zeile mitschreiben (--profile-log); eine Datei je Programmlauf,
+# die Partien sind in der Spalte game durchnummeriert
+PROFILE_LOG_FILE = None
+PROFILE_SECTIONS = ('input', 'update', 'draw', 'display')
+
+_fonts = {}
+# Fonts und Blöcke werden auch vom Warm-up-Thread geladen
+_font_lock = threading.Lock()
+_label_cache = OrderedDict()
+
+def init_pygame():
+    # nur die benutzten Module; pygame.init() startet auch Audio und Joysticks (langsam, ungenutzt)
+    pygame.display.init()
+    pygame.font.init()
+
+def load_fonts():
+    for size in FONT_SIZES:
+        get_font(size)
+
+def get_font(size):
+    font = _fonts.get(size)
+    if font is None:
+        with _font_lock:
+            font = _fonts.get(size)
+            if font is None:
+                font = _fonts[size] = pygame.font.SysFont(FONT_NAME, size)
+    return font
+
+_warm_up_thread = None
+
+def start_warm_up():
+    # Fonts (beim ersten SysFont wird die Liste der Systemschriften gelesen) und die Blöcke der vollen
+    # Zellgröße im Hintergrund laden, sobald ein Fenster existiert; was noch fehlt, lädt der erste Zugriff
+    global _warm_up_thread
+    if _warm_up_thread is None:
+        _warm_up_thread = threading.Thread(target=_warm_up, name="tetris-warm-up", daemon=True)
+        _warm_up_thread.start()
+
+def _warm_up():
+    load_fonts()
+    get_tile_atlas(MAX_GRID_SIZE)
+
+def render_text(text, size, color):
+    # gerenderte Labels nach (Text, Größe, Farbe) cachen, nur Änderungen werden neu gerastert
+    key = (text, size, color)
+    label = _label_cache.get(key)
+    if label is not None:
+        _label_cache.move_to_end(key)
+        return label
+    label = get_font(size).render(text, True, color)
+    _label_cache[key] = label
+    if len(_label_cache) > LABEL_CACHE_SIZE:
+        _label_cache.popitem(last=False)
+    return label
 
 def create_grid(locked_positions={}):
     grid = [[(0, 0, 0) for _ in range(COLUMNS)] for _ in range(ROWS)]
@@ -113,6 +210,7 @@ def create_grid(locked_positions={}):
     return grid
 
 def valid_space(shape, grid, offset):
+    # Listenbasierte Referenzimplementierung; das Spiel nutzt Board.fits
     off_x, off_y = offset
     for y, row in enumerate(shape):
         for x, cell in enumerate(row):
@@ -125,6 +223,20 @@ def valid_space(shape, grid, offset):
                     return False
     return True
 
+def check_collision_backends(board):
+    # vergleicht Board.fits mit valid_space für alle Steine, Rotationen und Positionen;
+    # liefert die Liste der Abweichungen (leer = beide Backends stimmen überein)
+    mismatches = []
+    grid = board.to_grid()
+    for index, rots in enumerate(ROTATIONS):
+        for rotation, shape in enumerate(rots):
+            for y in range(-len(shape), board.rows + 1):
+                for x in range(-len(shape[0]), board.cols + 1):
+                    expected = valid_space(shape, grid, (x, y))
+                    if board.fits(index, rotation, x, y) != expected:
+                        mismatches.append((index, rotation, x, y, expected))
+    return mismatches
+
 def get_ghost_y(shape, grid, start_x, start_y):
     # returns the y position where the shape would land (top-left y)
     y = start_y
@@ -136,128 +248,539 @@ def get_ghost_y(shape, grid, start_x, start_y):
             break
     return y
 
-def clear_rows(grid, locked):
-    full_rows = [y for y in range(ROWS) if (0, 0, 0) not in grid[y]]
-    if full_rows:
-        # Flash effect before clearing
-        for y in full_rows:
-            for x in range(COLUMNS):
-                grid[y][x] = (255, 255, 255)
-        pygame.display.update()
-        pygame.time.delay(150)
-
-    for y in full_rows:
-        for x in range(COLUMNS):
-            locked.pop((x, y), None)
-    for x, y in sorted(list(locked.keys()), key=lambda k: k[1], reverse=True):
-        shift = sum(1 for row in full_rows if y < row)
-        if shift:
-            locked[(x, y + shift)] = locked.pop((x, y))
-    return len(full_rows)
-
 def draw_grid_lines(surface):
-    for y in range(ROWS):
+    # Gitter über den sichtbaren Bereich; der Viewport scrollt in ganzen Zellen, das Muster bleibt gleich
+    for y in range(SCREEN_HEIGHT // GRID_SIZE):
         pygame.draw.line(surface, (50, 50, 50), (0, y * GRID_SIZE), (SCREEN_WIDTH, y * GRID_SIZE))
-    for x in range(COLUMNS):
+    for x in range(SCREEN_WIDTH // GRID_SIZE):
         pygame.draw.line(surface, (50, 50, 50), (x * GRID_SIZE, 0), (x * GRID_SIZE, SCREEN_HEIGHT))
 
-def draw_window(surface, grid, score, level, next_piece, hold_shape_index=None, current_piece=None):
-    surface.fill((0, 0, 0))
-    for y in range(ROWS):
-        for x in range(COLUMNS):
-            pygame.draw.rect(surface, grid[y][x], (x * GRID_SIZE, y * GRID_SIZE, GRID_SIZE, GRID_SIZE), 0)
-    draw_grid_lines(surface)
+class TileAtlas:
+    # Vorgerenderte Blöcke für eine Zellgröße: je Farbe normal, Ghost (gefüllt/Umriss) und Flash
+    def __init__(self, size):
+        self.size = size
+        self.blocks = {}
+        self.ghosts = {}
+        # Blöcke nach Farbindex des Boards (PALETTE; Index 0 = leer)
+        self.indexed = [None] + [self.block(color) for color in PALETTE[1:]]
+
+    def _finish(self, tile):
+        # an das Pixelformat des Fensters anpassen, sobald eines existiert
+        if pygame.display.get_surface() is not None:
+            return tile.convert_alpha() if tile.get_flags() & pygame.SRCALPHA else tile.convert()
+        return tile
+
+    def block(self, color):
+        tile = self.blocks.get(color)
+        if tile is None:
+            tile = pygame.Surface((self.size, self.size))
+            tile.fill(color)
+            tile = self.blocks[color] = self._finish(tile)
+            for style in ('filled', 'outline'):
+                ghost = pygame.Surface((self.size, self.size), pygame.SRCALPHA)
+                if style == 'filled':
+                    # semi-transparent ghost (more visible alpha)
+                    ghost.fill((*color[:3], 200))
+                pygame.draw.rect(ghost, color, (0, 0, self.size, self.size), 1)
+                self.ghosts[(color, style)] = self._finish(ghost)
+        return tile
+
+    def ghost(self, color, style):
+        self.block(color)
+        return self.ghosts[(color, style)]
+
+_tile_atlases = {}
+_atlas_lock = threading.Lock()
+
+def get_tile_atlas(size=None):
+    # ein Atlas je Zellgröße (Standard: GRID_SIZE), einmal aufgebaut
+    size = size or GRID_SIZE
+    atlas = _tile_atlases.get(size)
+    if atlas is None:
+        with _atlas_lock:
+            atlas = _tile_atlases.get(size)
+            if atlas is None:
+                atlas = _tile_atlases[size] = TileAtlas(size)
+    return atlas
+
+def blit_tiles(surface, tiles):
+    # alle Blöcke in einem Aufruf zeichnen (fblits wo verfügbar, sonst blits)
+    if hasattr(surface, 'fblits'):
+        surface.fblits(tiles)
+    else:
+        surface.blits(tiles, doreturn=False)
+
+def shape_tiles(shape, tile, x0, y0):
+    return [(tile, (x0 + x * GRID_SIZE, y0 + y * GRID_SIZE))
+            for y, row in enumerate(shape) for x, cell in enumerate(row) if cell]
+
+class Viewport:
+    # sichtbarer Ausschnitt des Spielfelds in ganzen Zellen; folgt dem aktiven Stein, sobald er
+    # näher als VIEW_MARGIN an den Rand kommt. Passt das Feld ganz ins Fenster, steht er bei (0, 0).
+    def __init__(self, cols, rows, width=None, height=None):
+        self.cols = cols
+        self.rows = rows
+        self.width = cols if width is None else min(cols, width)
+        self.height = rows if height is None else min(rows, height)
+        self.x = 0
+        self.y = 0
+
+    def follow(self, piece):
+        # True, wenn sich der Ausschnitt verschoben hat
+        x = self._follow_axis(self.x, piece.x, len(piece.shape[0]), self.width, self.cols)
+        y = self._follow_axis(self.y, piece.y, len(piece.shape), self.height, self.rows)
+        moved = (x, y) != (self.x, self.y)
+        self.x, self.y = x, y
+        return moved
+
+    def _follow_axis(self, start, pos, size, visible, total):
+        margin = max(0, min(VIEW_MARGIN, (visible - size) // 2))
+        if pos - margin < start:
+            start = pos - margin
+        elif pos + size + margin > start + visible:
+            start = pos + size + margin - visible
+        return max(0, min(start, total - visible))
+
+    def area(self):
+        # sichtbare Zellen als (x0, y0, x1, y1), x1/y1 exklusiv
+        return self.x, self.y, self.x + self.width, self.y + self.height
+
+def to_screen(view, x, y):
+    # Feld- in Fensterkoordinaten; ohne Viewport liegt das ganze Feld bei (0, 0)
+    if view is not None:
+        x -= view.x
+        y -= view.y
+    return x * GRID_SIZE, y * GRID_SIZE
+
+def draw_board(surface, board, grid_layer=None, view=None, area=None):
+    # zeichnet nur sichtbare Zellen; area = (x0, y0, x1, y1) beschränkt auf einen Teil davon
+    if area is None:
+        area = view.area() if view is not None else (0, 0, board.cols, board.rows)
+    x0, y0, x1, y1 = area
+    left, top = to_screen(view, x0, y0)
+    rect = pygame.Rect(left, top, (x1 - x0) * GRID_SIZE, (y1 - y0) * GRID_SIZE)
+    surface.fill((0, 0, 0), rect)
+    blocks = get_tile_atlas().indexed
+    tiles = []
+    for y in range(y0, y1):
+        # leere Reihen überspringen (auch während des Flashs bleibt row_fill gesetzt)
+        if not board.row_fill[y]:
+            continue
+        py = top + (y - y0) * GRID_SIZE
+        for x, index in enumerate(board.row(y, x0, x1)):
+            if index:
+                tiles.append((blocks[index], (left + x * GRID_SIZE, py)))
+    blit_tiles(surface, tiles)
+    if grid_layer is not None:
+        surface.blit(grid_layer, rect, rect)
+    else:
+        draw_grid_lines(surface)
 
-    font = pygame.font.SysFont("comicsans", 24)
+def draw_ghost(surface, board, current_piece, view=None):
+    ghost_y = board.drop_y(current_piece.index, current_piece.rotation, current_piece.x, current_piece.y)
+    tile = get_tile_atlas().ghost(current_piece.color, GHOST_STYLE)
+    blit_tiles(surface, shape_tiles(current_piece.shape, tile, *to_screen(view, current_piece.x, ghost_y)))
+    return ghost_y
+
+def draw_sidebar(surface, score, level, next_piece, hold_shape_index=None):
+    atlas = get_tile_atlas()
     # Sidebar-Offset verwenden
     sidebar_x = SCREEN_WIDTH
-    # Draw ghost for current piece if enabled
-    if GHOST_ENABLED and current_piece is not None:
-        ghost_y = get_ghost_y(current_piece.shape, grid, current_piece.x, current_piece.y)
-        # semi-transparent ghost surface (more visible alpha)
-        ghost_surf = pygame.Surface((GRID_SIZE, GRID_SIZE), pygame.SRCALPHA)
-        gx_color = (*current_piece.color[:3], 200)
-        ghost_surf.fill(gx_color)
-        for gy, row in enumerate(current_piece.shape):
-            for gx, cell in enumerate(row):
-                if cell:
-                    draw_x = (current_piece.x + gx) * GRID_SIZE
-                    draw_y = (ghost_y + gy) * GRID_SIZE
-                    if GHOST_STYLE == 'filled':
-                        surface.blit(ghost_surf, (draw_x, draw_y))
-                        pygame.draw.rect(surface, current_piece.color, (draw_x, draw_y, GRID_SIZE, GRID_SIZE), 1)
-                    else:
-                        # outline-only
-                        pygame.draw.rect(surface, current_piece.color, (draw_x, draw_y, GRID_SIZE, GRID_SIZE), 1)
     # Hold box
-    hold_label = font.render("Hold:", True, (255, 255, 255))
+    hold_label = render_text("Hold:", 24, (255, 255, 255))
     surface.blit(hold_label, (sidebar_x + 10, 10))
+    tiles = []
     if hold_shape_index is not None:
-        hold_shape = SHAPES[hold_shape_index]
-        hold_color = COLORS[hold_shape_index]
-        for y, row in enumerate(hold_shape):
-            for x, cell in enumerate(row):
-                if cell:
-                    pygame.draw.rect(surface, hold_color,
-                                     (sidebar_x + 10 + x * GRID_SIZE,
-                                      40 + y * GRID_SIZE, GRID_SIZE, GRID_SIZE), 0)
+        tiles += shape_tiles(SHAPES[hold_shape_index], atlas.block(COLORS[hold_shape_index]), sidebar_x + 10, 40)
 
     # Next box
-    label = font.render(f"Next:", True, (255, 255, 255))
+    label = render_text("Next:", 24, (255, 255, 255))
     surface.blit(label, (sidebar_x + 10, 140))
-    for y, row in enumerate(next_piece.shape):
-        for x, cell in enumerate(row):
-            if cell:
-                pygame.draw.rect(surface, next_piece.color,
-                                 (sidebar_x + 10 + x * GRID_SIZE,
-                                  170 + y * GRID_SIZE, GRID_SIZE, GRID_SIZE), 0)
+    tiles += shape_tiles(next_piece.shape, atlas.block(next_piece.color), sidebar_x + 10, 170)
+    blit_tiles(surface, tiles)
 
-    score_label = font.render(f"Score: {score}", True, (255, 255, 255))
-    level_label = font.render(f"Level: {level}", True, (255, 255, 255))
+    score_label = render_text(f"Score: {score}", 24, (255, 255, 255))
+    level_label = render_text(f"Level: {level}", 24, (255, 255, 255))
     surface.blit(score_label, (sidebar_x + 10, 300))
     surface.blit(level_label, (sidebar_x + 10, 330))
+
+def draw_piece(surface, current_piece, view=None):
+    tile = get_tile_atlas().block(current_piece.color)
+    blit_tiles(surface, shape_tiles(current_piece.shape, tile, *to_screen(view, current_piece.x, current_piece.y)))
+
+def draw_window(surface, board, score, level, next_piece, hold_shape_index=None, current_piece=None, view=None):
+    # Vollständiges Neuzeichnen; im Spiel wird GameRenderer mit Dirty-Rects verwendet
+    surface.fill((0, 0, 0))
+    draw_board(surface, board, view=view)
+    draw_sidebar(surface, score, level, next_piece, hold_shape_index)
+    # Stein und Ghost nicht über den Rand des Ausschnitts in die Sidebar zeichnen
+    surface.set_clip((0, 0, SCREEN_WIDTH, SCREEN_HEIGHT))
+    # Draw ghost for current piece if enabled
+    if GHOST_ENABLED and current_piece is not None:
+        draw_ghost(surface, board, current_piece, view)
     # Draw active piece on top
     if current_piece is not None:
-        for y, row in enumerate(current_piece.shape):
-            for x, cell in enumerate(row):
-                if cell:
-                    draw_x = (current_piece.x + x) * GRID_SIZE
-                    draw_y = (current_piece.y + y) * GRID_SIZE
-                    pygame.draw.rect(surface, current_piece.color, (draw_x, draw_y, GRID_SIZE, GRID_SIZE), 0)
-
-def draw_game_over(surface, score):
+        draw_piece(surface, current_piece, view)
+    surface.set_clip(None)
+
+def piece_rect(current_piece, y=None, view=None):
+    # Bildschirmbereich des Steins (Bounding Box), auf das Spielfeld begrenzt
+    if y is None:
+        y = current_piece.y
+    rect = pygame.Rect(*to_screen(view, current_piece.x, y),
+                       len(current_piece.shape[0]) * GRID_SIZE, len(current_piece.shape) * GRID_SIZE)
+    return rect.clip(pygame.Rect(0, 0, SCREEN_WIDTH, SCREEN_HEIGHT))
+
+class GameRenderer:
+    # Zeichnet das Spiel über gecachte Ebenen und liefert nur die geänderten Bereiche (Dirty-Rects).
+    # Der Aufwand hängt nur vom sichtbaren Ausschnitt ab, nicht von der Feldgröße.
+    def __init__(self, surface, board):
+        self.surface = surface
+        self.board = board
+        self.view = Viewport(board.cols, board.rows, SCREEN_WIDTH // GRID_SIZE, SCREEN_HEIGHT // GRID_SIZE)
+        self.board_rect = pygame.Rect(0, 0, SCREEN_WIDTH, SCREEN_HEIGHT)
+        self.sidebar_rect = pygame.Rect(SCREEN_WIDTH, 0, SIDEBAR_WIDTH, surface.get_height())
+        # Spielfeld + Sidebar; im Versus-Modus liegt rechts daneben die Gegneransicht
+        self.rect = self.board_rect.union(self.sidebar_rect)
+        # Gitterlinien einmalig vorrendern (Schwarz = transparent)
+        self.grid_layer = pygame.Surface(self.board_rect.size)
+        self.grid_layer.set_colorkey((0, 0, 0))
+        draw_grid_lines(self.grid_layer)
+        # eingerastete Blöcke + Gitter; neu aufgebaut nur bei Änderung des Boards
+        self.board_layer = pygame.Surface(self.board_rect.size)
+        self.board_version = None
+        self.piece_rects = []
+        self.sidebar_state = None
+        self.paused = False
+        self.paused_state = None
+        self.full_redraw = True
+
+    def invalidate(self):
+        self.full_redraw = True
+
+    def _rebuild_board_layer(self):
+        draw_board(self.board_layer, self.board, self.grid_layer, self.view)
+        self.board_version = self.board.version
+
+    def _scroll_board_layer(self, dx, dy):
+        # Ausschnitt um (dx, dy) Zellen verschoben: Bild verschieben, nur aufgedeckte Streifen zeichnen
+        if self.board_version != self.board.version:
+            # wird ohnehin komplett neu aufgebaut
+            return
+        view = self.view
+        if abs(dx) >= view.width or abs(dy) >= view.height:
+            self._rebuild_board_layer()
+            return
+        self.board_layer.scroll(-dx * GRID_SIZE, -dy * GRID_SIZE)
+        x0, y0, x1, y1 = view.area()
+        if dx > 0:
+            draw_board(self.board_layer, self.board, self.grid_layer, view, (x1 - dx, y0, x1, y1))
+        elif dx < 0:
+            draw_board(self.board_layer, self.board, self.grid_layer, view, (x0, y0, x0 - dx, y1))
+        if dy > 0:
+            draw_board(self.board_layer, self.board, self.grid_layer, view, (x0, y1 - dy, x1, y1))
+        elif dy < 0:
+            draw_board(self.board_layer, self.board, self.grid_layer, view, (x0, y0, x1, y0 - dy))
+
+    def draw(self, score, level, next_piece, hold_shape_index=None, current_piece=None, paused=False):
+        surface = self.surface
+        if paused:
+            # Pausenbild nur neu zeichnen, wenn sich darunter etwas geändert hat (z.B. Hold)
+            piece_state = None
+            if current_piece is not None:
+                piece_state = (current_piece.index, current_piece.rotation, current_piece.x, current_piece.y)
+            state = (score, level, next_piece.index, hold_shape_index, piece_state, self.board.version)
+            if self.paused and state == self.paused_state and not self.full_redraw:
+                return []
+            self.paused_state = state
+            self.full_redraw = True
+        elif self.paused:
+            self.full_redraw = True
+        self.paused = paused
+
+        dirty = []
+        if self.full_redraw:
+            surface.fill((0, 0, 0), self.rect)
+            self.sidebar_state = None
+            dirty.append(self.rect)
+        if current_piece is not None:
+            old_x, old_y = self.view.x, self.view.y
+            if self.view.follow(current_piece):
+                self._scroll_board_layer(self.view.x - old_x, self.view.y - old_y)
+                self.full_redraw = True
+        if self.board_version != self.board.version:
+            self._rebuild_board_layer()
+            self.full_redraw = True
+        if self.full_redraw:
+            surface.blit(self.board_layer, (0, 0))
+            dirty.append(self.board_rect)
+        else:
+            # Bereiche von Stein und Ghost aus dem letzten Frame wiederherstellen
+            for rect in self.piece_rects:
+                surface.blit(self.board_layer, rect, rect)
+                dirty.append(rect)
+
+        self.piece_rects = []
+        if current_piece is not None:
+            # Ghost unterhalb des Ausschnitts nicht in den Rest des Fensters zeichnen
+            surface.set_clip(self.board_rect)
+            if GHOST_ENABLED:
+                ghost_y = draw_ghost(surface, self.board, current_piece, self.view)
+                self.piece_rects.append(piece_rect(current_piece, ghost_y, self.view))
+            draw_piece(surface, current_piece, self.view)
+            surface.set_clip(None)
+            self.piece_rects.append(piece_rect(current_piece, view=self.view))
+            dirty.extend(self.piece_rects)
+
+        sidebar_state = (score, level, next_piece.index, hold_shape_index)
+        if sidebar_state != self.sidebar_state:
+            surface.fill((0, 0, 0), self.sidebar_rect)
+            draw_sidebar(surface, score, level, next_piece, hold_shape_index)
+            self.sidebar_state = sidebar_state
+            dirty.append(self.sidebar_rect)
+
+        if paused:
+            draw_pause(surface)
+        self.full_redraw = False
+        return dirty
+
+class OpponentPanel:
+    # Versus: Board des Gegners verkleinert (ein Byte je Zelle als 8-Bit-Bild mit PALETTE, dann
+    # skaliert), Name, Punkte und Verbindungsstatistik; neu gezeichnet nur bei Änderungen
+    def __init__(self, session):
+        self.session = session
+        self.opponent = session.opponent
+        board = self.opponent.board
+        self.rect = pygame.Rect(SCREEN_WIDTH + SIDEBAR_WIDTH, 0, OPPONENT_WIDTH, MIN_WINDOW_HEIGHT)
+        self.board_pos = (self.rect.x + 10, 40)
+        self.board_size = (board.cols * OPPONENT_CELL, board.rows * OPPONENT_CELL)
+        self.rect.height = max(self.rect.height, 40 + self.board_size[1] + 60)
+        self.palette = PALETTE + [(0, 0, 0)] * (256 - len(PALETTE))
+        self.state = None
+        self.stats_text = ""
+        self.stats_time = 0
+
+    def invalidate(self):
+        self.state = None
+
+    def draw(self, surface):
+        now = now_ms()
+        if now - self.stats_time >= 1000:
+            # Statistik einmal pro Sekunde aktualisieren
+            self.stats_time = now
+            steps, syncs, _ = self.session.rates()
+            stats = self.session.client.stats
+            elapsed = stats.elapsed()
+            self.stats_text = (f"{syncs:.0f} Hz, {steps:.0f} steps/s, "
+                               f"{(stats.bytes_out + stats.bytes_in) / elapsed / 1024:.1f} kB/s")
+        opponent = self.opponent
+        state = (opponent.version, self.stats_text)
+        if state == self.state:
+            return []
+        self.state = state
+        surface.fill((0, 0, 0), self.rect)
+        x0, y0 = self.board_pos
+        name = render_text(f"{opponent.name}{' - OUT' if opponent.game_over else ''}", 24, (255, 255, 255))
+        surface.blit(name, (x0, 10))
+        board = opponent.board
+        cells = pygame.image.frombuffer(board.cells, (board.cols, board.rows), 'P')
+        cells.set_palette(self.palette)
+        surface.blit(pygame.transform.scale(cells, self.board_size), (x0, y0))
+        if opponent.piece is not None:
+            index, rotation, px, py = opponent.piece
+            for y, row in enumerate(ROTATIONS[index][rotation]):
+                for x, cell in enumerate(row):
+                    if cell and py + y >= 0:
+                        surface.fill(COLORS[index], (x0 + (px + x) * OPPONENT_CELL, y0 + (py + y) * OPPONENT_CELL,
+                                                     OPPONENT_CELL, OPPONENT_CELL))
+        pygame.draw.rect(surface, (128, 128, 128), (x0 - 1, y0 - 1, self.board_size[0] + 2, self.board_size[1] + 2), 1)
+        score = render_text(f"Score: {opponent.score}  Lines: {opponent.lines}", 18, (255, 255, 255))
+        surface.blit(score, (x0, y0 + self.board_size[1] + 8))
+        surface.blit(render_text(self.stats_text, 18, (160, 160, 160)), (x0, y0 + self.board_size[1] + 30))
+        return [self.rect]
+
+_profile_log = None
+
+def get_profile_log():
+    # (Datei, CSV-Writer oder None, Nummer der Partie); beim ersten Aufruf geöffnet
+    global _profile_log
+    if _profile_log is None:
+        log = open(PROFILE_LOG_FILE, "w", newline="")
+        writer = None
+        if PROFILE_LOG_FILE.lower().endswith(".csv"):
+            writer = csv.writer(log)
+            writer.writerow(('game', 'frame', 'time_s', 'frame_ms') + tuple(f"{name}_ms" for name in PROFILE_SECTIONS)
+                            + ('latency_ms',))
+        _profile_log = [log, writer, 0]
+    _profile_log[2] += 1
+    return tuple(_profile_log)
+
+def close_profile_log():
+    global _profile_log
+    if _profile_log is not None:
+        _profile_log[0].close()
+        _profile_log = None
+
+class FrameProfiler:
+    # misst je Frame die Zeit der Abschnitte (input, update, draw, display) in ms
+    def __init__(self, window=PROFILE_WINDOW, log=None):
+        self.samples = {name: deque(maxlen=window) for name in ('frame', 'latency') + PROFILE_SECTIONS}
+        self.current = {}
+        self.latencies = []
+        self.frame_start = None
+        self.section_start = None
+        self.frames = 0
+        self.log, self.writer, self.game = log if log is not None else (None, None, 0)
+
+    def start_frame(self):
+        now = time.perf_counter()
+        if self.frame_start is not None:
+            self._finish_frame(now)
+        self.frame_start = now
+        self.section_start = now
+        self.current = dict.fromkeys(PROFILE_SECTIONS, 0.0)
+        self.latencies = []
+
+    def skip_frame(self):
+        # laufenden Frame verwerfen (z.B. nach dem Warten in der Pause)
+        self.frame_start = None
+
+    def mark(self, name):
+        # Zeit seit der letzten Marke dem Abschnitt name zuschlagen
+        now = time.perf_counter()
+        self.current[name] += (now - self.section_start) * 1000
+        self.section_start = now
+
+    def add_latency(self, ms):
+        # Tastendruck bis display.update dieses Frames
+        self.samples['latency'].append(ms)
+        self.latencies.append(ms)
+
+    def _finish_frame(self, now):
+        frame_ms = (now - self.frame_start) * 1000
+        self.samples['frame'].append(frame_ms)
+        for name in PROFILE_SECTIONS:
+            self.samples[name].append(self.current[name])
+        self.frames += 1
+        latency = round(max(self.latencies), 3) if self.latencies else None
+        if self.writer is not None:
+            self.writer.writerow([self.game, self.frames, round(self.frame_start, 6), round(frame_ms, 3)]
+                                 + [round(self.current[name], 3) for name in PROFILE_SECTIONS]
+                                 + ['' if latency is None else latency])
+        elif self.log is not None:
+            row = {'game': self.game, 'frame': self.frames, 'time_s': round(self.frame_start, 6),
+                   'frame_ms': round(frame_ms, 3)}
+            row.update((f"{name}_ms", round(self.current[name], 3)) for name in PROFILE_SECTIONS)
+            row['latency_ms'] = latency
+            self.log.write(json.dumps(row) + "\n")
+
+    def percentiles(self, name):
+        values = sorted(self.samples[name])
+        if not values:
+            return 0.0, 0.0
+        return values[len(values) // 2], values[min(len(values) - 1, int(len(values) * 0.99))]
+
+    def fps(self):
+        frames = self.samples['frame']
+        return 1000 * len(frames) / sum(frames) if frames and sum(frames) else 0.0
+
+    def close(self):
+        # die Datei bleibt für die nächste Partie offen (close_profile_log beim Beenden)
+        if self.log is not None:
+            self.log.flush()
+            self.log = None
+            self.writer = None
+
+class ProfileOverlay:
+    # Textblock unten in der Sidebar; der Text wird nur alle PROFILE_REFRESH_MS neu gerendert
+    def __init__(self):
+        line_h = get_font(18).get_linesize()
+        height = min(line_h * (len(PROFILE_SECTIONS) + 4) + 8, max(0, SCREEN_HEIGHT - 370))
+        self.rect = pygame.Rect(SCREEN_WIDTH, SCREEN_HEIGHT - height, SIDEBAR_WIDTH, height)
+        self.image = None
+        self.updated = 0
+
+    def draw(self, surface, profiler):
+        now = now_ms()
+        if self.image is None or now - self.updated >= PROFILE_REFRESH_MS:
+            self.image = self._render(profiler)
+            self.updated = now
+        surface.fill((0, 0, 0), self.rect)
+        surface.blit(self.image, self.rect.topleft)
+        return self.rect
+
+    def clear(self, surface):
+        surface.fill((0, 0, 0), self.rect)
+        self.image = None
+        return self.rect
+
+    def _render(self, profiler):
+        # direkt über den Font rendern: die wechselnden Zahlen sollen den Label-Cache nicht verdrängen
+        font = get_font(18)
+        p50, p99 = profiler.percentiles('frame')
+        lines = [f"FPS {profiler.fps():.0f}", "ms   p50 / p99", f"frame {p50:.1f} / {p99:.1f}"]
+        for name in PROFILE_SECTIONS:
+            p50, p99 = profiler.percentiles(name)
+            lines.append(f"{name} {p50:.2f} / {p99:.2f}")
+        p50, p99 = profiler.percentiles('latency')
+        lines.append(f"key>screen {p50:.1f} / {p99:.1f}")
+        image = pygame.Surface(self.rect.size)
+        line_h = font.get_linesize()
+        for i, text in enumerate(lines):
+            image.blit(font.render(text, True, (160, 220, 160)), (8, 4 + i * line_h))
+        return image
+
+def draw_game_over(surface, score, title="GAME OVER"):
     surface.fill((0, 0, 0))
-    font_big = pygame.font.SysFont("comicsans", 48)
-    font_small = pygame.font.SysFont("comicsans", 30)
-    label = font_big.render("GAME OVER", True, (255, 0, 0))
-    score_label = font_small.render(f"Score: {score}", True, (255, 255, 255))
+    label = render_text(title, 48, (255, 0, 0))
+    score_label = render_text(f"Score: {score}", 30, (255, 255, 255))
     surface.blit(label, (SCREEN_WIDTH // 2 - label.get_width() // 2, SCREEN_HEIGHT // 2 - 50))
     surface.blit(score_label, (SCREEN_WIDTH // 2 - score_label.get_width() // 2, SCREEN_HEIGHT // 2))
     pygame.display.update()
-    pygame.time.delay(1500)
+    # warten, ohne das Fenster einzufrieren; False = Fenster wurde geschlossen
+    deadline = now_ms() + GAME_OVER_MS
+    while True:
+        remaining = deadline - now_ms()
+        if remaining <= 0:
+            return True
+        for event in wait_events(max(1, int(remaining))):
+            if event.type == pygame.QUIT:
+                return False
+            if event.type == pygame.KEYDOWN:
+                return True
+            if event.type == pygame.WINDOWEXPOSED:
+                pygame.display.update()
 
 def draw_pause(surface):
     # Draw a semi-transparent overlay and PAUSED label; do not call display.update() here
     overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
     overlay.fill((0, 0, 0, 150))
     surface.blit(overlay, (0, 0))
-    font = pygame.font.SysFont("comicsans", 48)
-    label = font.render("PAUSED", True, (255, 255, 0))
+    label = render_text("PAUSED", 48, (255, 255, 0))
     surface.blit(label, (SCREEN_WIDTH // 2 - label.get_width() // 2, SCREEN_HEIGHT // 2 - 24))
 
+def wait_events(timeout=None):
+    # blockiert bis zum nächsten Ereignis (höchstens timeout ms) und liefert es mit allen weiteren wartenden
+    event = pygame.event.wait() if timeout is None else pygame.event.wait(timeout)
+    if event.type == pygame.NOEVENT:
+        return []
+    return [event] + pygame.event.get()
+
 def get_player_name(surface):
-    font = pygame.font.SysFont("comicsans", 28)
     name = ""
     entering = True
+    redraw = True
     while entering:
-        surface.fill((0, 0, 0))
-        prompt = font.render("Enter your name:", True, (255, 255, 255))
-        surface.blit(prompt, (SCREEN_WIDTH // 2 - prompt.get_width() // 2, SCREEN_HEIGHT // 2 - 40))
-        name_text = font.render(name, True, (255, 255, 0))
-        surface.blit(name_text, (SCREEN_WIDTH // 2 - name_text.get_width() // 2, SCREEN_HEIGHT // 2))
-        pygame.display.update()
-
-        for event in pygame.event.get():
+        if redraw:
+            surface.fill((0, 0, 0))
+            prompt = render_text("Enter your name:", 28, (255, 255, 255))
+            surface.blit(prompt, (SCREEN_WIDTH // 2 - prompt.get_width() // 2, SCREEN_HEIGHT // 2 - 40))
+            name_text = render_text(name, 28, (255, 255, 0))
+            surface.blit(name_text, (SCREEN_WIDTH // 2 - name_text.get_width() // 2, SCREEN_HEIGHT // 2))
+            pygame.display.update()
+            redraw = False
+
+        for event in wait_events():
             if event.type == pygame.QUIT:
                 entering = False
             elif event.type == pygame.KEYDOWN:
@@ -268,74 +791,76 @@ def get_player_name(surface):
                 else:
                     if len(name) < 10:
                         name += event.unicode
+                redraw = True
+            elif event.type == pygame.WINDOWEXPOSED:
+                redraw = True
     return name.strip() if name.strip() else "Player"
 
-def load_leaderboard():
-    if not os.path.exists(LEADERBOARD_FILE):
-        return []
-    entries = []
-    with open(LEADERBOARD_FILE, "r") as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            parts = line.split(' ', 2)
-            # expected: score size name  (e.g. "1234 10x20 Alice")
-            if len(parts) == 3:
-                score_str, size_str, name = parts
-                try:
-                    score = int(score_str)
-                except ValueError:
-                    score = 0
-                if 'x' in size_str:
-                    try:
-                        cols_str, rows_str = size_str.split('x')
-                        cols = int(cols_str)
-                        rows = int(rows_str)
-                    except Exception:
-                        cols = None
-                        rows = None
-                else:
-                    cols = None
-                    rows = None
-                entries.append((name, score, cols, rows))
-            else:
-                # fallback to old format: score name
-                parts2 = line.split(' ', 1)
-                if len(parts2) == 2:
-                    score_str, name = parts2
-                    try:
-                        score = int(score_str)
-                    except ValueError:
-                        score = 0
-                    entries.append((name, score, None, None))
-    return entries
-
-def save_leaderboard(entries):
-    with open(LEADERBOARD_FILE, "w") as f:
-        for name, score, cols, rows in entries:
-            if cols and rows:
-                f.write(f"{score} {cols}x{rows} {name}\n")
-            else:
-                f.write(f"{score} {name}\n")
+_leaderboard = None
+_writer = None
+
+def get_writer():
+    global _writer
+    if _writer is None:
+        _writer = BackgroundWriter()
+    return _writer
+
+def close_writer():
+    # ausstehende Schreibaufträge abschließen (beim Beenden)
+    global _writer
+    if _writer is not None:
+        _writer.close()
+        _writer = None
+
+def suspend_game(engine, recorder):
+    # Snapshot sofort, Serialisieren und Schreiben im Writer-Thread
+    get_writer().submit(SaveState.capture(engine, recorder.replay).save, SAVE_FILE)
+
+def load_suspended_game():
+    # Spielstand laden und löschen (einmal fortsetzbar); None, wenn keiner da oder er unlesbar ist
+    get_writer().flush()
+    if not os.path.exists(SAVE_FILE):
+        return None
+    try:
+        save = SaveState.load(SAVE_FILE)
+    except (OSError, ValueError, struct.error, zlib.error) as e:
+        print(f"cannot resume {SAVE_FILE}: {e}", file=sys.stderr)
+        save = None
+    os.remove(SAVE_FILE)
+    return save
+
+def get_leaderboard():
+    global _leaderboard
+    if _leaderboard is None:
+        _leaderboard = LeaderboardStore(LEADERBOARD_DB, LEADERBOARD_FILE)
+    return _leaderboard
+
+def load_leaderboard(cols=None, rows=None):
+    # Top-Einträge (name, score, cols, rows), je Feldgröße oder gesamt; aus dem Cache des Stores
+    return get_leaderboard().top(LEADERBOARD_SIZE, cols, rows)
+
+def _write_score(path, name, score, cols, rows):
+    # läuft im Writer-Thread: eigene Verbindung (SQLite-Verbindungen gehören zu ihrem Thread)
+    store = LeaderboardStore(path, LEADERBOARD_FILE)
+    try:
+        store.add(name, score, cols, rows)
+    finally:
+        store.close()
+
+def _post_leaderboard_updated():
+    pygame.event.post(pygame.event.Event(LEADERBOARD_UPDATED))
 
 def update_leaderboard(name, score, cols=None, rows=None):
-    leaderboard = load_leaderboard()
-    leaderboard.append((name, score, cols, rows))
-    leaderboard.sort(key=lambda x: x[1], reverse=True)
-    leaderboard = leaderboard[:5]
-    save_leaderboard(leaderboard)
+    # im Hintergrund speichern; das Menü zeichnet neu, sobald der Eintrag committed ist
+    get_writer().submit(_write_score, LEADERBOARD_DB, name, score, cols, rows, on_done=_post_leaderboard_updated)
 
 def draw_menu(surface, highscore, selected_preset=0):
     surface.fill((30, 30, 30))
-    font_big = pygame.font.SysFont("comicsans", 48)
-    font_small = pygame.font.SysFont("comicsans", 24)
-    font_mini = pygame.font.SysFont("comicsans", 18)
 
     # Gesamtbreite (Spielfeld + Sidebar)
     total_width = SCREEN_WIDTH + SIDEBAR_WIDTH
 
-    title = font_big.render("TETRIS ENHANCED", True, (0, 255, 255))
+    title = render_text("TETRIS ENHANCED", 48, (0, 255, 255))
     title_x = max(0, min(total_width // 2 - title.get_width() // 2, total_width - title.get_width()))
     surface.blit(title, (title_x, 20))
 
@@ -352,7 +877,7 @@ def draw_menu(surface, highscore, selected_preset=0):
     if button_rect.collidepoint((mouse_x, mouse_y)):
         btn_color = (0, 230, 0)
     pygame.draw.rect(surface, btn_color, button_rect, border_radius=6)
-    button_text = font_small.render("START", True, (255, 255, 255))
+    button_text = render_text("START", 24, (255, 255, 255))
     surface.blit(button_text, (button_rect.x + 35, button_rect.y + 10))
 
     # Generic option button size
@@ -372,7 +897,7 @@ def draw_menu(surface, highscore, selected_preset=0):
         pygame.draw.rect(surface, (200, 200, 200), icon_rect)
     else:
         pygame.draw.rect(surface, (200, 200, 200), icon_rect, 2)
-    ghost_label = font_small.render(f"Ghost: {'ON' if GHOST_ENABLED else 'OFF'}", True, (255, 255, 255))
+    ghost_label = render_text(f"Ghost: {'ON' if GHOST_ENABLED else 'OFF'}", 24, (255, 255, 255))
     surface.blit(ghost_label, (icon_rect.right + 8, ghost_btn_rect.y + 6))
 
     # Ghost style toggle (smaller button)
@@ -387,7 +912,7 @@ def draw_menu(surface, highscore, selected_preset=0):
         pygame.draw.rect(surface, (180, 180, 255), s_icon)
     else:
         pygame.draw.rect(surface, (180, 180, 255), s_icon, 2)
-    style_label = font_small.render(f"Ghost style: {GHOST_STYLE}", True, (255, 255, 255))
+    style_label = render_text(f"Ghost style: {GHOST_STYLE}", 24, (255, 255, 255))
     surface.blit(style_label, (s_icon.right + 8, style_btn_rect.y + 6))
 
     # Debounce option
@@ -399,31 +924,39 @@ def draw_menu(surface, highscore, selected_preset=0):
     # debounce icon: small +/- box
     d_icon = pygame.Rect(debounce_btn_rect.x + 6, debounce_btn_rect.y + 6, opt_h - 12, opt_h - 12)
     pygame.draw.rect(surface, (200, 200, 100), d_icon, border_radius=2)
-    debounce_label = font_small.render(f"Debounce: {DEBOUNCE_MS}ms", True, (255, 255, 255))
+    debounce_label = render_text(f"Debounce: {DEBOUNCE_MS}ms", 24, (255, 255, 255))
     surface.blit(debounce_label, (d_icon.right + 8, debounce_btn_rect.y + 6))
 
-    # Leaderboard (rechts)
-    surface.blit(font_small.render("Leaderboard:", True, (255, 255, 0)), (right_x, 140))
+    # AI option (rechte Spalte, unter dem Leaderboard)
+    ai_btn_rect = pygame.Rect(right_x, 330, opt_w, opt_h)
+    ai_bg = (50, 50, 50)
+    if ai_btn_rect.collidepoint((mouse_x, mouse_y)):
+        ai_bg = (80, 80, 80)
+    pygame.draw.rect(surface, ai_bg, ai_btn_rect, border_radius=4)
+    a_icon = pygame.Rect(ai_btn_rect.x + 6, ai_btn_rect.y + 6, opt_h - 12, opt_h - 12)
+    if AI_ENABLED:
+        pygame.draw.rect(surface, (120, 220, 120), a_icon)
+    else:
+        pygame.draw.rect(surface, (120, 220, 120), a_icon, 2)
+    ai_label = render_text(f"AI: {'ON' if AI_ENABLED else 'OFF'}", 24, (255, 255, 255))
+    surface.blit(ai_label, (a_icon.right + 8, ai_btn_rect.y + 6))
+
+    # Leaderboard (rechts) für die gewählte Feldgröße
+    preset_cols, preset_rows = BOARD_SIZES[selected_preset]
+    surface.blit(render_text(f"Leaderboard {preset_cols}x{preset_rows}:", 24, (255, 255, 0)), (right_x, 140))
     y_pos = 170
-    leaderboard = load_leaderboard()
-    for i, entry in enumerate(leaderboard):
-        # entry is (name, score, cols, rows)
-        if len(entry) >= 4:
-            name, score, cols, rows = entry
-        else:
-            name, score = entry[0], entry[1]
-            cols = rows = None
-        size_text = f" {cols}x{rows}" if cols and rows else ""
-        surface.blit(font_mini.render(f"{i+1}. {name} - {score}{size_text}", True, (255, 255, 255)), (right_x + 10, y_pos))
+    for i, (name, score, cols, rows) in enumerate(load_leaderboard(preset_cols, preset_rows)):
+        surface.blit(render_text(f"{i+1}. {name} - {score}", 18, (255, 255, 255)), (right_x + 10, y_pos))
         y_pos += 25
 
-    # Preset buttons (labels 1-4) in left column below options (larger)
+    # Preset buttons (labels 1-4, 5 = eigene Größe) in left column below options (larger)
     preset_rects = []
     px = left_x + 20
     py = 340
     preset_w = opt_w
-    preset_h = opt_h + 8
-    for i, (c, r) in enumerate(GRID_PRESETS):
+    # bei mehr Einträgen flacher, damit die Liste über dem Hinweis endet
+    preset_h = min(opt_h + 8, (MENU_HEIGHT - 40 - py) // len(BOARD_SIZES) - 8)
+    for i, (c, r) in enumerate(BOARD_SIZES):
         rect = pygame.Rect(px, py + i * (preset_h + 8), preset_w, preset_h)
         bg = (60, 60, 60)
         if i == selected_preset:
@@ -431,254 +964,474 @@ def draw_menu(surface, highscore, selected_preset=0):
         if rect.collidepoint((mouse_x, mouse_y)):
             bg = (90, 90, 90)
         pygame.draw.rect(surface, bg, rect, border_radius=6)
-        text = font_small.render(f"{i+1}: {c}x{r}", True, (255, 255, 255))
+        text = render_text(f"{i+1}: {c}x{r}", 24, (255, 255, 255))
         surface.blit(text, (rect.x + 12, rect.y + 6))
         preset_rects.append(rect)
 
     # Shortcut hint line
-    hint = font_mini.render("Shortcuts: S/Enter Start  G Ghost  T Style  D Debounce  1-4 Presets", True, (180, 180, 180))
+    resume_hint = "  R Resume" if os.path.exists(SAVE_FILE) else ""
+    hint = render_text(f"Shortcuts: S/Enter Start  G Ghost  T Style  D Debounce  A AI  1-{len(BOARD_SIZES)} Presets{resume_hint}", 18, (180, 180, 180))
     surface.blit(hint, (left_x + 10, MENU_HEIGHT - 30))
     pygame.display.update()
-    return button_rect, ghost_btn_rect, style_btn_rect, debounce_btn_rect, preset_rects
+    return button_rect, ghost_btn_rect, style_btn_rect, debounce_btn_rect, ai_btn_rect, preset_rects
 
 def select_level(surface):
     levels = [0, 4, 8, 12, 16, 20]
     selected = 0
-    font = pygame.font.SysFont("comicsans", 28)
     selecting = True
+    redraw = True
     while selecting:
-        surface.fill((0, 0, 0))
-        label = font.render("Select starting level", True, (255, 255, 255))
-        surface.blit(label, (SCREEN_WIDTH // 2 - label.get_width() // 2, 100))
-        for i, lvl in enumerate(levels):
-            color = (255, 255, 0) if i == selected else (200, 200, 200)
-            text = font.render(str(lvl), True, color)
-            surface.blit(text, (SCREEN_WIDTH // 2 - text.get_width() // 2, 200 + i * 40))
-        pygame.display.update()
-        for event in pygame.event.get():
+        if redraw:
+            surface.fill((0, 0, 0))
+            label = render_text("Select starting level", 28, (255, 255, 255))
+            surface.blit(label, (SCREEN_WIDTH // 2 - label.get_width() // 2, 100))
+            for i, lvl in enumerate(levels):
+                color = (255, 255, 0) if i == selected else (200, 200, 200)
+                text = render_text(str(lvl), 28, color)
+                surface.blit(text, (SCREEN_WIDTH // 2 - text.get_width() // 2, 200 + i * 40))
+            pygame.display.update()
+            redraw = False
+        for event in wait_events():
             if event.type == pygame.QUIT:
                 selecting = False
                 return levels[selected]
             elif event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_UP:
                     selected = (selected - 1) % len(levels)
+                    redraw = True
                 elif event.key == pygame.K_DOWN:
                     selected = (selected + 1) % len(levels)
+                    redraw = True
                 elif event.key == pygame.K_RETURN:
                     return levels[selected]
-
-def game_loop(win, highscore, start_level):
+            elif event.type == pygame.WINDOWEXPOSED:
+                redraw = True
+
+# Tastenbelegung -> Richtungen (DAS/ARR über InputHandler) bzw. Engine-Aktionen
+KEY_DIRECTIONS = {
+    pygame.K_LEFT: LEFT,
+    pygame.K_RIGHT: RIGHT,
+}
+KEY_ACTIONS = {
+    pygame.K_DOWN: SOFT_DROP,
+    pygame.K_UP: ROTATE,
+    pygame.K_SPACE: HARD_DROP,
+    pygame.K_b: HOLD,
+}
+KEY_RELEASE_ACTIONS = {
+    pygame.K_DOWN: RELEASE_SOFT_DROP,
+}
+
+def key_debounce_ms(key):
+    if key in KEY_DEBOUNCE_MS:
+        return KEY_DEBOUNCE_MS[key]
+    return DEBOUNCE_MS if key in TOGGLE_KEYS else 0
+
+def now_ms():
+    return time.perf_counter() * 1000
+
+def game_loop(win, highscore, start_level, save=None, versus=None):
+    global PROFILE_OVERLAY
     clock = pygame.time.Clock()
-    locked_positions = {}
-    shape_index = random.randint(0, len(SHAPES) - 1)
-    current_piece = Tetromino(SHAPES[shape_index], COLORS[shape_index])
-    next_shape_index = random.randint(0, len(SHAPES) - 1)
-    next_piece = Tetromino(SHAPES[next_shape_index], COLORS[next_shape_index])
-    fall_time = 0
-    score = 0
-    level = start_level
-    fall_speed = max(0.1, 0.5 - (level * 0.05))
-    soft_drop = False
-    soft_drop_speed = 0.05
-    left_hold = False
-    right_hold = False
-    move_delay = 0.08
-    move_time = 0
+    if save is not None:
+        # fortgesetzte Partie: Replay läuft mit den bisherigen Schritten weiter
+        engine = save.new_engine()
+        recorder = ReplayRecorder(engine, save.replay)
+    elif versus is not None:
+        # gleicher Seed wie beim Gegner; Garbage-Reihen kommen als Aktionen ins Replay
+        engine = versus.new_engine(start_level)
+        recorder = ReplayRecorder(engine)
+    else:
+        engine = TetrisEngine(COLUMNS, ROWS, start_level)
+        recorder = ReplayRecorder(engine)
+    rewind = Rewind(COLUMNS, ROWS)
+    rewinding = False
+    rewind_time = 0
+    suspended = False
+    renderer = GameRenderer(win, engine.board)
+    opponent_panel = OpponentPanel(versus) if versus is not None else None
+    autoplayer = AutoPlayer() if AI_ENABLED else None
+    profiler = FrameProfiler(log=get_profile_log() if PROFILE_LOG_FILE else None)
+    overlay = ProfileOverlay()
     run = True
     paused = False
     # Debounce-Tabelle: speichert zuletzt registrierte Zeit pro Key
     last_key_time = {}
-    # Hold-Funktionalität
-    hold_shape_index = None
-    hold_used = False  # kann nur einmal pro erzeugtem Stein benutzt werden
 
-    while run:
-        grid = create_grid(locked_positions)
-        # Verwende dt vom Clock; wenn pausiert, Zeit nicht erhöhen
-        dt = clock.tick(FPS)
-        if not paused:
-            fall_time += dt
-            move_time += dt / 1000
-
-        if left_hold and move_time >= move_delay:
-            if valid_space(current_piece.shape, grid, (current_piece.x - 1, current_piece.y)):
-                current_piece.x -= 1
-            move_time = 0
-        if right_hold and move_time >= move_delay:
-            if valid_space(current_piece.shape, grid, (current_piece.x + 1, current_piece.y)):
-                current_piece.x += 1
-            move_time = 0
-
-        current_fall_speed = soft_drop_speed if soft_drop else fall_speed
-        if fall_time / 1000 >= current_fall_speed:
-            fall_time = 0
-            current_piece.y += 1
-            if not valid_space(current_piece.shape, grid, (current_piece.x, current_piece.y)):
-                current_piece.y -= 1
-                for y, row in enumerate(current_piece.shape):
-                    for x, cell in enumerate(row):
-                        if cell:
-                            locked_positions[(current_piece.x + x, current_piece.y + y)] = current_piece.color
-                # Aktualisiere das Grid sofort, damit volle Reihen erkannt werden
-                grid = create_grid(locked_positions)
-                score += 10
-                lines_cleared = clear_rows(grid, locked_positions)
-                score += lines_cleared * 100
-                level = start_level + score // 500
-                fall_speed = max(0.1, 0.5 - (level * 0.05))
-                # Nach dem Entfernen neu erstellen
-                grid = create_grid(locked_positions)
-
-                shape_index = next_shape_index
-                current_piece = Tetromino(SHAPES[shape_index], COLORS[shape_index])
-                next_shape_index = random.randint(0, len(SHAPES) - 1)
-                next_piece = Tetromino(SHAPES[next_shape_index], COLORS[next_shape_index])
-                # Neuer Stein aus Next: Hold wieder erlauben
-                hold_used = False
-                if not valid_space(current_piece.shape, grid, (current_piece.x, current_piece.y)):
-                    draw_game_over(win, score)
-                    name = get_player_name(win)
-                    update_leaderboard(name, score, COLUMNS, ROWS)
-                    run = False
+    ticks = TickAccumulator()
+    # Tastenereignisse mit Zeitstempel; Links/Rechts-Wiederholung per DAS/ARR
+    keys = InputHandler(DAS_MS, ARR_MS, COLUMNS)
+    # weitere Aktionen (Hold, Autoplayer) warten bis zum nächsten Logikschritt
+    actions = []
 
-        for event in pygame.event.get():
+    focused = True
+
+    while run:
+        if paused:
+            # Pausenbild steht schon auf dem Schirm: bis zum nächsten Ereignis schlafen
+            events = wait_events()
+            clock.tick()
+            frame_ms = 0
+            profiler.skip_frame()
+        else:
+            if not focused:
+                # Autoplayer im Hintergrund: Logik läuft exakt weiter, gezeichnet wird selten
+                frame_ms = clock.tick(UNFOCUSED_FPS)
+            elif RENDER_MODE == 'capped':
+                frame_ms = clock.tick(FPS)
+            else:
+                frame_ms = clock.tick()
+            events = pygame.event.get()
+        profiler.start_frame()
+        # Ereignisse am Frame-Anfang lesen und mit dem Lesezeitpunkt versehen
+        for event in events:
+            stamp = now_ms()
             if event.type == pygame.QUIT:
                 run = False
+            if event.type == pygame.WINDOWFOCUSLOST:
+                focused = False
+                if autoplayer is None and versus is None and not paused:
+                    # niemand spielt: automatisch pausieren
+                    paused = True
+                    keys.release_all(stamp)
+                    actions += keys.due(stamp) + [RELEASE_SOFT_DROP]
+            if event.type == pygame.WINDOWFOCUSGAINED:
+                focused = True
             if event.type == pygame.KEYDOWN:
-                # Debounce: ignore repeated quick presses of the same key
-                now = pygame.time.get_ticks()
-                last = last_key_time.get(event.key, 0)
-                if now - last < DEBOUNCE_MS:
+                # Debounce je Taste: ignore repeated quick presses of the same key
+                last = last_key_time.get(event.key)
+                if last is not None and stamp - last < key_debounce_ms(event.key):
                     continue
-                last_key_time[event.key] = now
+                last_key_time[event.key] = stamp
 
+                if event.key == pygame.K_F3:
+                    PROFILE_OVERLAY = not PROFILE_OVERLAY
+                    if not PROFILE_OVERLAY:
+                        pygame.display.update(overlay.clear(win))
+                    continue
+                if versus is not None and event.key in (pygame.K_p, SUSPEND_KEY, REWIND_KEY):
+                    # der Gegner spielt weiter: kein Pausieren, Speichern oder Zurückspulen
+                    continue
                 if event.key == pygame.K_p:
                     paused = not paused
                     if paused:
                         # Reset input-holds so Bewegung stoppt vollständig
-                        left_hold = False
-                        right_hold = False
-                        soft_drop = False
-                        draw_pause(win)
+                        keys.release_all(stamp)
+                        actions += keys.due(stamp) + [RELEASE_SOFT_DROP]
+                    continue
+                if event.key == pygame.K_b and paused:
+                    # Hold/Swap geht auch pausiert und wird dann sofort angewandt
+                    actions.append(HOLD)
                     continue
-                if event.key == pygame.K_b:
-                    # Hold/Swap
-                    if hold_shape_index is None:
-                        # Leerer Hold: verschiebe aktuellen Stein in Hold und spawne Next
-                        hold_shape_index = shape_index
-                        shape_index = next_shape_index
-                        current_piece = Tetromino(SHAPES[shape_index], COLORS[shape_index])
-                        next_shape_index = random.randint(0, len(SHAPES) - 1)
-                        next_piece = Tetromino(SHAPES[next_shape_index], COLORS[next_shape_index])
-                        hold_used = True
-                    else:
-                        # Tausch nur erlaubt, wenn noch nicht benutzt für diese Runde
-                        if not hold_used:
-                            # swap
-                            temp = hold_shape_index
-                            hold_shape_index = shape_index
-                            shape_index = temp
-                            current_piece = Tetromino(SHAPES[shape_index], COLORS[shape_index])
-                            # mark as used
-                            hold_used = True
+                if event.key == SUSPEND_KEY:
+                    suspend_game(engine, recorder)
+                    suspended = True
+                    run = False
                     continue
                 if paused:
                     continue
-                if event.key == pygame.K_LEFT:
-                    left_hold = True
-                    if valid_space(current_piece.shape, grid, (current_piece.x - 1, current_piece.y)):
-                        current_piece.x -= 1
-                    move_time = 0
-                elif event.key == pygame.K_RIGHT:
-                    right_hold = True
-                    if valid_space(current_piece.shape, grid, (current_piece.x + 1, current_piece.y)):
-                        current_piece.x += 1
-                    move_time = 0
-                elif event.key == pygame.K_DOWN:
-                    soft_drop = True
-                elif event.key == pygame.K_UP:
-                    rotated = [list(row) for row in zip(*current_piece.shape[::-1])]
-                    if valid_space(rotated, grid, (current_piece.x, current_piece.y)):
-                        current_piece.rotate()
-                    elif valid_space(rotated, grid, (current_piece.x - 1, current_piece.y)):
-                        current_piece.x -= 1
-                        current_piece.rotate()
-                    elif valid_space(rotated, grid, (current_piece.x + 1, current_piece.y)):
-                        current_piece.x += 1
-                        current_piece.rotate()
-                elif event.key == pygame.K_SPACE:
-                    while valid_space(current_piece.shape, grid, (current_piece.x, current_piece.y + 1)):
-                        current_piece.y += 1
-                    for y, row in enumerate(current_piece.shape):
-                        for x, cell in enumerate(row):
-                            if cell:
-                                locked_positions[(current_piece.x + x, current_piece.y + y)] = current_piece.color
-                    # Update grid before clearing rows to detect volle Reihen sofort
-                    grid = create_grid(locked_positions)
-                    score += 10
-                    lines_cleared = clear_rows(grid, locked_positions)
-                    score += lines_cleared * 100
-                    level = start_level + score // 500
-                    fall_speed = max(0.1, 0.5 - (level * 0.05))
-                    grid = create_grid(locked_positions)
-                    shape_index = next_shape_index
-                    current_piece = Tetromino(SHAPES[shape_index], COLORS[shape_index])
-                    next_shape_index = random.randint(0, len(SHAPES) - 1)
-                    next_piece = Tetromino(SHAPES[next_shape_index], COLORS[next_shape_index])
-                    # Neuer Stein aus Next: Hold wieder erlauben
-                    hold_used = False
-                    if not valid_space(current_piece.shape, grid, (current_piece.x, current_piece.y)):
-                        draw_game_over(win, score)
-                        name = get_player_name(win)
-                        update_leaderboard(name, score, COLUMNS, ROWS)
-                        run = False
+                if event.key == REWIND_KEY:
+                    # gehaltene Tasten und noch nicht angewandte Eingaben gehören zur verworfenen Zukunft
+                    rewinding = True
+                    rewind_time = 0
+                    keys.release_all(stamp)
+                    keys.due(stamp)
+                    actions = []
+                    continue
+                if event.key in KEY_DIRECTIONS:
+                    keys.press(KEY_DIRECTIONS[event.key], stamp)
+                elif event.key in KEY_ACTIONS:
+                    keys.tap(KEY_ACTIONS[event.key], stamp)
             if event.type == pygame.KEYUP:
-                if event.key == pygame.K_LEFT:
-                    left_hold = False
-                elif event.key == pygame.K_RIGHT:
-                    right_hold = False
-                elif event.key == pygame.K_DOWN:
-                    soft_drop = False
-
-    # active piece is drawn by draw_window (so ghost calculation uses grid without it)
+                if event.key == REWIND_KEY and rewinding:
+                    rewinding = False
+                    # Soft Drop des zurückgeholten Zustands gilt nicht mehr als gehalten
+                    actions.append(RELEASE_SOFT_DROP)
+                elif event.key in KEY_DIRECTIONS:
+                    keys.release(KEY_DIRECTIONS[event.key], stamp)
+                elif event.key in KEY_RELEASE_ACTIONS and not paused:
+                    keys.tap(KEY_RELEASE_ACTIONS[event.key], stamp)
+
+        profiler.mark('input')
+        if rewinding and not paused:
+            # rückwärts in Echtzeit: je Intervall Frame-Zeit ein Snapshot zurück, die Zukunft wird verworfen
+            ticks.reset()
+            rewind_time += frame_ms
+            while rewind_time >= rewind.interval_ms and rewind:
+                rewind_time -= rewind.interval_ms
+                recorder.truncate(rewind.back(engine))
+        elif paused:
+            # keine Spielzeit; Hold/Loslassen trotzdem sofort anwenden
+            ticks.reset()
+            if actions:
+                recorder.record(0, actions)
+                engine.step(0, actions)
+                actions = []
+        else:
+            if versus is not None:
+                # Garbage vom Gegner gilt ab dem nächsten Schritt (eingeschoben wird beim nächsten Spawn)
+                actions += versus.receive()
+            if autoplayer is not None:
+                actions += autoplayer.actions(engine)
+            # jeder Schritt bekommt die bis zu seinem Zeitpunkt fälligen Eingaben; der letzte alles bis jetzt
+            now = now_ms()
+            count = ticks.advance(frame_ms)
+            for i in range(count):
+                actions += keys.due(now - (count - 1 - i) * TICK_MS)
+                recorder.record(TICK_MS, actions)
+                engine.step(TICK_MS, actions)
+                rewind.record(engine, TICK_MS, len(recorder.replay.steps))
+                actions = []
+                if engine.game_over:
+                    break
+            if versus is not None:
+                versus.update(engine, count)
+        profiler.mark('update')
+        if versus is not None and versus.finished:
+            draw_game_over(win, engine.score, "YOU WIN" if versus.won else "YOU LOSE")
+            run = False
+        elif engine.game_over:
+            # Fenster geschlossen: ohne Namensabfrage unter dem Standardnamen speichern
+            name = get_player_name(win) if draw_game_over(win, engine.score) else "Player"
+            update_leaderboard(name, engine.score, COLUMNS, ROWS)
+            run = False
+
+        if not run:
+            break
+        # active piece is drawn by the renderer (so ghost calculation uses the board without it)
+        dirty = renderer.draw(engine.score, engine.level, engine.next_piece, engine.hold_shape_index,
+                              engine.current_piece, paused)
+        if opponent_panel is not None:
+            dirty += opponent_panel.draw(win)
+        if PROFILE_OVERLAY:
+            dirty.append(overlay.draw(win, profiler))
+        profiler.mark('draw')
+        if dirty:
+            pygame.display.update(dirty)
+        profiler.mark('display')
+        # Latenz Tastendruck (Lesezeitpunkt) bis Bild auf dem Schirm
+        shown = now_ms()
+        for stamp in keys.take_stamps():
+            profiler.add_latency(shown - stamp)
+
+    profiler.close()
+    if not suspended:
+        # eine unterbrochene Partie steht samt Replay im Spielstand
+        get_writer().submit(recorder.finish().save, LAST_REPLAY_FILE)
+    return highscore
 
-        draw_window(win, grid, score, level, next_piece, hold_shape_index, current_piece)
-        if paused:
-            draw_pause(win)
-        pygame.display.update()
+def replay_loop(win, replay):
+    # Replay in Echtzeit abspielen: jeder Schritt wird zu seinem aufgezeichneten Zeitpunkt ausgeführt
+    engine = replay.new_engine()
+    renderer = GameRenderer(win, engine.board)
+    start = now_ms()
+    game_time = 0
+    for dt, actions in replay.steps:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+                return engine
+        game_time += dt
+        wait = int(game_time - (now_ms() - start))
+        if wait > 0:
+            pygame.time.delay(wait)
+        engine.step(dt, actions)
+        dirty = renderer.draw(engine.score, engine.level, engine.next_piece, engine.hold_shape_index,
+                              engine.current_piece)
+        if dirty:
+            pygame.display.update(dirty)
+    return engine
+
+def desktop_size():
+    sizes = pygame.display.get_desktop_sizes() if pygame.display.get_init() else []
+    return sizes[0] if sizes else FALLBACK_DESKTOP
+
+def layout_window(cols, rows, desktop, opponent=False):
+    # Zellgröße und sichtbaren Ausschnitt für ein Feld wählen; liefert die Fenstergröße
+    global SCREEN_WIDTH, SCREEN_HEIGHT, COLUMNS, ROWS, SIDEBAR_WIDTH, GRID_SIZE, OPPONENT_WIDTH, OPPONENT_CELL
+    avail_width = desktop[0] - WINDOW_MARGIN[0]
+    avail_height = desktop[1] - WINDOW_MARGIN[1]
+    OPPONENT_WIDTH = OPPONENT_CELL = 0
+    if opponent:
+        # Gegner verkleinert und immer vollständig (kein Ausschnitt): Platz für Name und Punkte lassen
+        OPPONENT_CELL = max(1, min(MAX_GRID_SIZE // 2, (avail_width // OPPONENT_SHARE - 20) // cols,
+                                   (avail_height - 100) // rows))
+        OPPONENT_WIDTH = max(cols * OPPONENT_CELL + 20, 200)
+        avail_width -= OPPONENT_WIDTH
+    # Platz für die Sidebar abziehen (wie unten: ein Fünftel der Feldbreite, 120..300 px)
+    max_width = avail_width - max(120, min(300, avail_width // 6))
+    GRID_SIZE = max(MIN_GRID_SIZE, min(MAX_GRID_SIZE, max_width // cols, avail_height // rows))
+    SCREEN_WIDTH = min(cols, max_width // GRID_SIZE) * GRID_SIZE
+    SCREEN_HEIGHT = min(rows, avail_height // GRID_SIZE) * GRID_SIZE
+    COLUMNS = cols
+    ROWS = rows
+    SIDEBAR_WIDTH = max(120, min(300, SCREEN_WIDTH // 5))
+    height = max(SCREEN_HEIGHT, MIN_WINDOW_HEIGHT)
+    if opponent:
+        height = max(height, rows * OPPONENT_CELL + 100)
+    return SCREEN_WIDTH + SIDEBAR_WIDTH + OPPONENT_WIDTH, height
+
+def setup_game_window(cols, rows, opponent=False):
+    # Initialize game window sized for the visible play area + sidebar (+ Gegner im Versus-Modus)
+    size = layout_window(cols, rows, desktop_size(), opponent)
+    win = None
+    if RENDER_MODE == 'vsync':
+        # VSync gibt es in pygame nur mit SCALED/OPENGL; ohne Unterstützung normal weiter
+        try:
+            win = pygame.display.set_mode(size, pygame.SCALED, vsync=1)
+        except pygame.error:
+            win = None
+    if win is None:
+        win = pygame.display.set_mode(size)
+    pygame.display.set_caption("Tetris Enhanced")
+    return win
+
+def draw_waiting(surface, text):
+    surface.fill((0, 0, 0))
+    label = render_text(text, 30, (255, 255, 255))
+    hint = render_text("ESC to cancel", 18, (160, 160, 160))
+    width, height = surface.get_size()
+    surface.blit(label, (width // 2 - label.get_width() // 2, height // 2 - 30))
+    surface.blit(hint, (width // 2 - hint.get_width() // 2, height // 2 + 10))
+    pygame.display.update()
 
-    return highscore
+def run_versus(address, name):
+    # eine Partie gegen einen anderen Client über den Relay-Server (python tetris_versus.py server);
+    # asyncio wird erst hier geladen
+    from tetris_versus import VersusClient, VersusSession, wait_for_start, parse_address
+    host, port = parse_address(address)
+    win = pygame.display.set_mode((MENU_WIDTH, MENU_HEIGHT))
+    pygame.display.set_caption("Tetris Enhanced - Versus")
+    start_warm_up()
+    draw_waiting(win, f"Waiting for an opponent on {host}:{port}")
+    client = VersusClient(host, port, name)
+
+    def keep_waiting():
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+                return False
+            if event.type == pygame.WINDOWEXPOSED:
+                pygame.display.update()
+        return True
+
+    start = wait_for_start(client, poll=keep_waiting)
+    if start is None:
+        if client.error is not None:
+            print(f"versus: cannot connect to {host}:{port}: {client.error}", file=sys.stderr)
+        client.close()
+        return
+    session = VersusSession(client, start)
+    win = setup_game_window(session.cols, session.rows, opponent=True)
+    game_loop(win, 0, 0, versus=session)
+    client.close()
+    steps, syncs, sync_ms = session.rates()
+    print(f"versus: {'won' if session.won else 'lost' if session.lost else 'left'} against {session.opponent.name}, "
+          f"{steps:.0f} steps/s, sync {syncs:.1f} Hz ({sync_ms:.3f} ms each), {client.stats.summary()}")
+
+def run_replay(path, fast=False):
+    replay = Replay.load(path)
+    if fast:
+        # ohne Fenster, so schnell wie möglich
+        engine = play_fast(replay)
+    else:
+        init_pygame()
+        win = setup_game_window(replay.cols, replay.rows)
+        start_warm_up()
+        engine = replay_loop(win, replay)
+        pygame.quit()
+    print(f"Replay {path}: score {engine.score}, lines {engine.lines}, pieces {engine.pieces}")
+    if engine.game_over and not matches(replay, engine):
+        print(f"Abweichung! Aufgezeichnet: score {replay.score}, lines {replay.lines}, pieces {replay.pieces}")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Tetris Enhanced")
+    parser.add_argument("--replay", metavar="FILE", help=f"play back a recorded game (e.g. {LAST_REPLAY_FILE})")
+    parser.add_argument("--fast", action="store_true", help="with --replay: fast-forward without rendering")
+    parser.add_argument("--render", choices=RENDER_MODES, default=RENDER_MODE,
+                        help=f"frame pacing: capped at {FPS} FPS, vsync, or uncapped (game logic always runs at a fixed {TICK_MS} ms step)")
+    parser.add_argument("--size", type=parse_size, metavar="COLSxROWS",
+                        help="add a custom grid size to the menu and select it (larger boards scroll)")
+    parser.add_argument("--das", type=int, metavar="MS", help="delayed auto shift for left/right (default 80)")
+    parser.add_argument("--arr", type=int, metavar="MS", help="auto repeat rate for left/right, 0 = instant (default 80)")
+    parser.add_argument("--profile", action="store_true", help="start games with the profiling overlay (F3) shown")
+    parser.add_argument("--profile-log", metavar="FILE", help="write per-frame timings to FILE (.csv, otherwise JSONL)")
+    parser.add_argument("--versus", metavar="HOST[:PORT]",
+                        help="play one versus game via a relay server (python tetris_versus.py server)")
+    parser.add_argument("--name", default="Player", help="with --versus: name shown to the opponent")
+    parser.add_argument("--startup-time", action="store_true",
+                        help="print the time to the first menu frame and exit (used by tetris_bench.py)")
+    return parser.parse_args(argv)
 
 def main():
-    global SCREEN_WIDTH, SCREEN_HEIGHT, COLUMNS, ROWS, SIDEBAR_WIDTH, GHOST_ENABLED, GHOST_STYLE, DEBOUNCE_MS
-    pygame.init()
+    global GHOST_ENABLED, GHOST_STYLE, DEBOUNCE_MS, AI_ENABLED, PROFILE_OVERLAY, PROFILE_LOG_FILE, RENDER_MODE
+    args = parse_args()
+    RENDER_MODE = args.render
+    if args.das is not None:
+        DAS_MS.update(dict.fromkeys(DAS_MS, args.das))
+    if args.arr is not None:
+        ARR_MS.update(dict.fromkeys(ARR_MS, args.arr))
+    PROFILE_OVERLAY = args.profile
+    PROFILE_LOG_FILE = args.profile_log
+    if args.replay:
+        run_replay(args.replay, args.fast)
+        return
+    init_pygame()
+    if args.versus:
+        run_versus(args.versus, args.name)
+        close_writer()
+        close_profile_log()
+        pygame.quit()
+        return
     highscore = 0
 
     # Menu runs in fixed-size window
     menu_win = pygame.display.set_mode((MENU_WIDTH, MENU_HEIGHT))
     pygame.display.set_caption("Tetris Enhanced - Menu")
+    started = time.perf_counter()
+    start_warm_up()
 
     selected_preset = 0
+    resume = False
+    if args.size:
+        if args.size not in BOARD_SIZES:
+            BOARD_SIZES.append(args.size)
+        selected_preset = BOARD_SIZES.index(args.size)
     running = True
     while running:
-        button_rect, ghost_rect, style_rect, debounce_rect, preset_rects = draw_menu(menu_win, highscore, selected_preset)
         menu = True
+        redraw = True
+        hovered = None
         while menu:
-            for event in pygame.event.get():
+            if redraw:
+                button_rect, ghost_rect, style_rect, debounce_rect, ai_rect, preset_rects = draw_menu(menu_win, highscore, selected_preset)
+                redraw = False
+                if args.startup_time:
+                    # Zeiten ab Skriptstart in ms: Imports, pygame und Fenster, erstes Menübild
+                    shown = time.perf_counter()
+                    print(f"startup imports={(STARTUP_IMPORTED - STARTUP_START) * 1000:.1f} "
+                          f"init={(started - STARTUP_IMPORTED) * 1000:.1f} menu={(shown - STARTUP_START) * 1000:.1f}",
+                          flush=True)
+                    running = menu = False
+                    break
+            # schläft bis zum nächsten Ereignis; gezeichnet wird nur bei Änderungen
+            for event in wait_events():
                 if event.type == pygame.QUIT:
                     running = False
                     menu = False
                 elif event.type == pygame.KEYDOWN:
-                    # Shortcuts: S/ENTER start, G ghost toggle, T style toggle, D debounce, 1-4 presets
+                    # Shortcuts: S/ENTER start, R resume, G ghost toggle, T style toggle, D debounce, A AI, 1-5 presets
                     if event.key in (pygame.K_s, pygame.K_RETURN):
                         menu = False
                         break
+                    if event.key == pygame.K_r and os.path.exists(SAVE_FILE):
+                        resume = True
+                        menu = False
+                        break
                     if event.key == pygame.K_g:
                         GHOST_ENABLED = not GHOST_ENABLED
-                        button_rect, ghost_rect, style_rect, debounce_rect, preset_rects = draw_menu(menu_win, highscore, selected_preset)
+                        redraw = True
                     if event.key == pygame.K_t:
                         GHOST_STYLE = 'outline' if GHOST_STYLE == 'filled' else 'filled'
-                        button_rect, ghost_rect, style_rect, debounce_rect, preset_rects = draw_menu(menu_win, highscore, selected_preset)
+                        redraw = True
                     if event.key == pygame.K_d:
                         options = [50, 100, 150, 250]
                         try:
@@ -686,10 +1439,13 @@ def main():
                             DEBOUNCE_MS = options[(idx + 1) % len(options)]
                         except ValueError:
                             DEBOUNCE_MS = 150
-                        button_rect, ghost_rect, style_rect, debounce_rect, preset_rects = draw_menu(menu_win, highscore, selected_preset)
-                    if event.key in (pygame.K_1, pygame.K_2, pygame.K_3, pygame.K_4):
-                        selected_preset = int(event.unicode) - 1
-                        button_rect, ghost_rect, style_rect, debounce_rect, preset_rects = draw_menu(menu_win, highscore, selected_preset)
+                        redraw = True
+                    if event.key == pygame.K_a:
+                        AI_ENABLED = not AI_ENABLED
+                        redraw = True
+                    if pygame.K_1 <= event.key < pygame.K_1 + len(BOARD_SIZES):
+                        selected_preset = event.key - pygame.K_1
+                        redraw = True
                 elif event.type == pygame.MOUSEBUTTONDOWN:
                     pos = event.pos
                     # map mouse pos to menu coordinates (menu_win)
@@ -698,10 +1454,10 @@ def main():
                         break
                     if ghost_rect.collidepoint(pos):
                         GHOST_ENABLED = not GHOST_ENABLED
-                        button_rect, ghost_rect, style_rect, debounce_rect, preset_rects = draw_menu(menu_win, highscore, selected_preset)
+                        redraw = True
                     if style_rect.collidepoint(pos):
                         GHOST_STYLE = 'outline' if GHOST_STYLE == 'filled' else 'filled'
-                        button_rect, ghost_rect, style_rect, debounce_rect, preset_rects = draw_menu(menu_win, highscore, selected_preset)
+                        redraw = True
                     if debounce_rect.collidepoint(pos):
                         options = [50, 100, 150, 250]
                         try:
@@ -709,31 +1465,44 @@ def main():
                             DEBOUNCE_MS = options[(idx + 1) % len(options)]
                         except ValueError:
                             DEBOUNCE_MS = 150
-                        button_rect, ghost_rect, style_rect, debounce_rect, preset_rects = draw_menu(menu_win, highscore, selected_preset)
+                        redraw = True
+                    if ai_rect.collidepoint(pos):
+                        AI_ENABLED = not AI_ENABLED
+                        redraw = True
                     # presets
                     for idx, rect in enumerate(preset_rects):
                         if rect.collidepoint(pos):
                             selected_preset = idx
-                            button_rect, ghost_rect, style_rect, debounce_rect, preset_rects = draw_menu(menu_win, highscore, selected_preset)
-            pygame.time.delay(10)
+                            redraw = True
+                elif event.type == pygame.MOUSEMOTION:
+                    # Hover-Hervorhebung nur neu zeichnen, wenn die Maus einen anderen Button erreicht
+                    rects = [button_rect, ghost_rect, style_rect, debounce_rect, ai_rect] + preset_rects
+                    now_hovered = next((i for i, rect in enumerate(rects) if rect.collidepoint(event.pos)), None)
+                    if now_hovered != hovered:
+                        hovered = now_hovered
+                        redraw = True
+                elif event.type in (pygame.WINDOWEXPOSED, LEADERBOARD_UPDATED):
+                    redraw = True
 
         if not running:
             break
 
+        if resume:
+            resume = False
+            save = load_suspended_game()
+            if save is not None:
+                win = setup_game_window(save.cols, save.rows)
+                game_loop(win, highscore, save.start_level, save)
+            continue
+
         # Start game with selected preset
-        cols, rows = GRID_PRESETS[selected_preset]
-        SCREEN_WIDTH = cols * GRID_SIZE
-        SCREEN_HEIGHT = rows * GRID_SIZE
-        COLUMNS = cols
-        ROWS = rows
-        SIDEBAR_WIDTH = max(120, min(300, SCREEN_WIDTH // 5))
-
-        # Initialize game window sized for play area + sidebar
-        win = pygame.display.set_mode((SCREEN_WIDTH + SIDEBAR_WIDTH, SCREEN_HEIGHT))
-        pygame.display.set_caption("Tetris Enhanced")
+        cols, rows = BOARD_SIZES[selected_preset]
+        win = setup_game_window(cols, rows)
         start_level = select_level(win)
         game_loop(win, highscore, start_level)
 
+    close_writer()
+    close_profile_log()
     pygame.quit()
 
 if __name__ == "__main__":
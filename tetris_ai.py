@@ -0,0 +1,313 @@
+# Autoplayer: sucht für jeden Stein die beste erreichbare Platzierung (Rotation + Spalte),
+# optional mit Hold und einem Zug Vorausschau auf den Next-Stein, und bewertet die
+# entstehenden Felder mit der üblichen Heuristik (Höhe, Löcher, Unebenheit, Reihen).
+# Arbeitet direkt auf dem Bitboard/der Skyline der Engine; ohne pygame lauffähig.
+
+import argparse
+import time
+
+from tetris_engine import (ROTATIONS, ROTATION_MASKS, ROTATION_WIDTHS, ROTATION_BOTTOMS, TICK_MS, TetrisEngine,
+                           SHIFT_LEFT, SHIFT_RIGHT, ROTATE, HARD_DROP, HOLD)
+
+# Gewichte nach Yiyuan Lee ("Tetris AI - The (Near) Perfect Bot")
+DEFAULT_WEIGHTS = {
+    'height': -0.510066,
+    'lines': 0.760666,
+    'holes': -0.35663,
+    'bumpiness': -0.184483,
+}
+# so viele beste Platzierungen des aktuellen Steins werden mit dem zweiten Stein weiter untersucht
+LOOKAHEAD_BEAM = 8
+
+# oberste belegte Zeile je Spalte der Rotation
+ROTATION_TOPS = [[[min(y for y, row in enumerate(rot) if row[x]) for x in range(len(rot[0]))] for rot in rots]
+                 for rots in ROTATIONS]
+
+def _count_holes(rows):
+    # leere Zellen unterhalb der jeweiligen Spaltenoberkante
+    covered = 0
+    holes = 0
+    for bits in rows:
+        holes += bin(covered & ~bits).count("1")
+        covered |= bits
+    return holes
+
+def _tops(rows, cols):
+    tops = [len(rows)] * cols
+    missing = (1 << cols) - 1
+    for y, bits in enumerate(rows):
+        hit = bits & missing
+        while hit:
+            low = hit & -hit
+            tops[low.bit_length() - 1] = y
+            hit ^= low
+        missing &= ~bits
+        if not missing:
+            break
+    return tops
+
+def _surface(tops, total_rows):
+    # Gesamthöhe und Unebenheit (Summe der Höhenunterschiede benachbarter Spalten) der Skyline
+    height = total_rows * len(tops) - sum(tops)
+    bumpiness = sum(abs(a - b) for a, b in zip(tops, tops[1:]))
+    return height, bumpiness
+
+class SearchBoard:
+    # schlanker Zustand für die Suche: Reihen-Bits, Skyline, Anzahl Löcher sowie Gesamthöhe und
+    # Unebenheit; alle Kennzahlen werden beim Platzieren nur für die Spalten des Steins nachgeführt
+    __slots__ = ('rows', 'tops', 'holes', 'cols', 'height', 'bumpiness')
+
+    def __init__(self, rows, tops, holes, cols, height=None, bumpiness=None):
+        self.rows = rows
+        self.tops = tops
+        self.holes = holes
+        self.cols = cols
+        if height is None:
+            height, bumpiness = _surface(tops, len(rows))
+        self.height = height
+        self.bumpiness = bumpiness
+
+    @classmethod
+    def from_board(cls, board):
+        return cls(list(board.row_bits), list(board.heights), _count_holes(board.row_bits), board.cols)
+
+    def fits(self, index, rotation, x, y):
+        # wie Board.fits
+        masks = ROTATION_MASKS[index][rotation]
+        if x < 0 or x + ROTATION_WIDTHS[index][rotation] > self.cols or y + len(masks) > len(self.rows):
+            return False
+        rows = self.rows
+        for dy, mask in enumerate(masks):
+            if y + dy >= 0 and rows[y + dy] & (mask << x):
+                return False
+        return True
+
+    def landing(self, index, rotation, x, y):
+        # Landereihe über die Skyline; liefert außerdem, ob der Stein auf der Skyline aufliegt
+        tops = self.tops
+        landing = len(self.rows)
+        for dx, bottom in enumerate(ROTATION_BOTTOMS[index][rotation]):
+            if y + bottom >= tops[x + dx]:
+                # unter einem Überhang: Reihe für Reihe prüfen
+                while self.fits(index, rotation, x, y + 1):
+                    y += 1
+                return y, False
+            landing = min(landing, tops[x + dx] - bottom - 1)
+        return landing, True
+
+    def _clears(self, index, rotation, x, y):
+        # ob der bei y gelandete Stein eine Reihe füllt
+        full = (1 << self.cols) - 1
+        rows = self.rows
+        for dy, mask in enumerate(ROTATION_MASKS[index][rotation]):
+            if rows[y + dy] | (mask << x) == full:
+                return True
+        return False
+
+    def _settle(self, index, rotation, x, y):
+        # Stein bei y auf der Skyline ohne Löschung: Skyline, Löcher, Höhe und Unebenheit ändern sich nur
+        # in den Spalten des Steins (Unebenheit zusätzlich an den Kanten zu den Nachbarspalten).
+        # Liefert (neue Skyline der Spalten x.., Löcher, Höhe, Unebenheit)
+        tops = self.tops
+        piece_tops = ROTATION_TOPS[index][rotation]
+        holes = self.holes
+        height = self.height
+        bumpiness = self.bumpiness
+        segment = []
+        old_left = new_left = tops[x - 1] if x > 0 else None
+        for dx, bottom in enumerate(ROTATION_BOTTOMS[index][rotation]):
+            old = tops[x + dx]
+            new = y + piece_tops[dx]
+            holes += old - (y + bottom) - 1
+            height += old - new
+            if old_left is not None:
+                bumpiness += abs(new - new_left) - abs(old - old_left)
+            old_left = old
+            new_left = new
+            segment.append(new)
+        right = x + len(segment)
+        if right < self.cols:
+            bumpiness += abs(tops[right] - new_left) - abs(tops[right] - old_left)
+        return segment, holes, height, bumpiness
+
+    def place(self, index, rotation, x, y=0):
+        # Stein ab (x, y) gerade fallen lassen; liefert (neues SearchBoard, gelöschte Reihen)
+        y, on_skyline = self.landing(index, rotation, x, y)
+        rows = list(self.rows)
+        for dy, mask in enumerate(ROTATION_MASKS[index][rotation]):
+            rows[y + dy] |= mask << x
+        if not on_skyline or self._clears(index, rotation, x, y):
+            full = (1 << self.cols) - 1
+            kept = [bits for bits in rows if bits != full]
+            lines = len(rows) - len(kept)
+            rows = [0] * lines + kept
+            return SearchBoard(rows, _tops(rows, self.cols), _count_holes(rows), self.cols), lines
+        segment, holes, height, bumpiness = self._settle(index, rotation, x, y)
+        tops = list(self.tops)
+        tops[x:x + len(segment)] = segment
+        return SearchBoard(rows, tops, holes, self.cols, height, bumpiness), 0
+
+    def score(self, index, rotation, x, y, weights):
+        # Bewertung wie place(...) + evaluate(...), im häufigen Fall (keine Löschung, auf der Skyline)
+        # ohne Kopie von Reihen und Skyline
+        landed, on_skyline = self.landing(index, rotation, x, y)
+        if not on_skyline or self._clears(index, rotation, x, landed):
+            after, lines = self.place(index, rotation, x, y)
+            return after.evaluate(lines, weights)
+        _, holes, height, bumpiness = self._settle(index, rotation, x, landed)
+        return (weights['height'] * height + weights['holes'] * holes + weights['bumpiness'] * bumpiness)
+
+    def evaluate(self, lines, weights):
+        return (weights['height'] * self.height + weights['lines'] * lines
+                + weights['holes'] * self.holes + weights['bumpiness'] * self.bumpiness)
+
+def reachable_placements(search, index, rotation, x, y):
+    # (Drehungen, x nach dem Drehen, Ziel-x, Ziel-Rotation) für alle erreichbaren Platzierungen;
+    # Drehen wie die Engine (Wall-Kick 0/-1/+1), dann seitlich schieben, dann Hard Drop
+    if not search.fits(index, rotation, x, y):
+        return []
+    placements = []
+    seen = set()
+    for presses in range(4):
+        masks = tuple(ROTATION_MASKS[index][rotation])
+        if masks not in seen:
+            seen.add(masks)
+            left = x
+            while search.fits(index, rotation, left - 1, y):
+                left -= 1
+            right = x
+            while search.fits(index, rotation, right + 1, y):
+                right += 1
+            for target in range(left, right + 1):
+                placements.append((presses, x, target, rotation))
+        next_rotation = (rotation + 1) % 4
+        for dx in (0, -1, 1):
+            if search.fits(index, next_rotation, x + dx, y):
+                x += dx
+                rotation = next_rotation
+                break
+        else:
+            break
+    return placements
+
+class Move:
+    def __init__(self, hold, presses, start_x, target_x, rotation, score):
+        self.hold = hold
+        self.presses = presses
+        self.start_x = start_x
+        self.target_x = target_x
+        self.rotation = rotation
+        self.score = score
+
+    def actions(self):
+        actions = [HOLD] if self.hold else []
+        actions += [ROTATE] * self.presses
+        shift = self.target_x - self.start_x
+        if shift < 0:
+            actions += [SHIFT_LEFT] * -shift
+        else:
+            actions += [SHIFT_RIGHT] * shift
+        actions.append(HARD_DROP)
+        return actions
+
+class AutoPlayer:
+    def __init__(self, weights=None, lookahead=True, beam=LOOKAHEAD_BEAM):
+        self.weights = weights or DEFAULT_WEIGHTS
+        self.lookahead = lookahead
+        self.beam = beam
+        self._planned_piece = None
+        self.decisions = 0
+        self.decision_time = 0.0
+
+    def actions(self, engine):
+        # einmal pro neuem Stein planen und alle Tastenaktionen auf einmal liefern
+        piece = engine.current_piece
+        if piece is None or engine.game_over or piece is self._planned_piece:
+            return []
+        self._planned_piece = piece
+        start = time.perf_counter()
+        move = self.best_move(engine)
+        self.decision_time += time.perf_counter() - start
+        self.decisions += 1
+        return move.actions() if move is not None else [HARD_DROP]
+
+    def _best_value(self, search, index, cols):
+        # beste Bewertung für einen Stein ab Spawn-Position
+        x = cols // 2 - ROTATION_WIDTHS[index][0] // 2
+        best = None
+        for presses, start_x, target, rotation in reachable_placements(search, index, 0, x, 0):
+            value = search.score(index, rotation, target, 0, self.weights)
+            if best is None or value > best:
+                best = value
+        return best
+
+    def best_move(self, engine):
+        piece = engine.current_piece
+        cols = engine.cols
+        search = SearchBoard.from_board(engine.board)
+        next_index = engine.next_piece.index
+
+        # Optionen: (hold?, Stein, Start-Rotation, x, y, Kandidaten für den zweiten Stein)
+        options = [(False, piece.index, piece.rotation, piece.x, piece.y,
+                    [next_index] + ([engine.hold_shape_index] if engine.hold_shape_index is not None else []))]
+        if not engine.hold_used:
+            if engine.hold_shape_index is None:
+                # Hold leer: Next kommt sofort, der aktuelle Stein liegt danach im Hold
+                alt, second = next_index, [piece.index]
+            else:
+                alt, second = engine.hold_shape_index, [next_index, piece.index]
+            options.append((True, alt, 0, cols // 2 - ROTATION_WIDTHS[alt][0] // 2, 0, second))
+
+        candidates = []
+        for hold, index, rotation, x, y, second in options:
+            for presses, start_x, target, target_rotation in reachable_placements(search, index, rotation, x, y):
+                value = search.score(index, target_rotation, target, y, self.weights)
+                candidates.append((value, Move(hold, presses, start_x, target, target_rotation, value), index, y, second))
+        if not candidates:
+            return None
+        candidates.sort(key=lambda c: c[0], reverse=True)
+        if not self.lookahead:
+            return candidates[0][1]
+
+        best_move = None
+        best_value = None
+        # nur die Kandidaten im Beam werden tatsächlich platziert
+        for value, move, index, y, second in candidates[:self.beam]:
+            after, _ = search.place(index, move.rotation, move.target_x, y)
+            follow = [v for v in (self._best_value(after, index, cols) for index in set(second)) if v is not None]
+            # keine Folgeplatzierung möglich = Partie verloren
+            total = value + max(follow) if follow else value - 1e6
+            if best_value is None or total > best_value:
+                best_value = total
+                best_move = move
+        return best_move
+
+def play_game(cols=10, rows=20, seed=None, max_pieces=None, start_level=0, dt=TICK_MS, player=None):
+    # Headless-Partie mit dem Autoplayer; liefert die Engine nach Spielende
+    engine = TetrisEngine(cols, rows, start_level, seed)
+    player = player or AutoPlayer()
+    while not engine.game_over and (max_pieces is None or engine.pieces < max_pieces):
+        engine.step(dt, player.actions(engine))
+    return engine
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless Tetris autoplayer")
+    parser.add_argument("--cols", type=int, default=10)
+    parser.add_argument("--rows", type=int, default=20)
+    parser.add_argument("--games", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-pieces", type=int, default=1000)
+    parser.add_argument("--no-lookahead", action="store_true")
+    args = parser.parse_args()
+    for game in range(args.games):
+        player = AutoPlayer(lookahead=not args.no_lookahead)
+        start = time.perf_counter()
+        engine = play_game(args.cols, args.rows, args.seed + game, args.max_pieces, player=player)
+        elapsed = time.perf_counter() - start
+        per_decision = player.decision_time / max(player.decisions, 1) * 1000
+        print(f"game {game}: {args.cols}x{args.rows} score {engine.score}, lines {engine.lines}, "
+              f"pieces {engine.pieces}{' (game over)' if engine.game_over else ''}, "
+              f"{engine.pieces / elapsed:.0f} pieces/s, {per_decision:.2f} ms/decision")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+# Vektorisierter Batch-Simulator: N Spielfelder in einem NumPy-Array (N x ROWS x COLUMNS).
+# Jeder Schritt legt auf allen Feldern gleichzeitig den aktuellen Stein ab (Rotation + Spalte,
+# gerade von oben fallen gelassen), prüft Kollisionen, löscht volle Reihen und wertet wie
+# TetrisEngine: +10 je Stein, +100 je Reihe, Level = Startlevel + Score // 500.
+# Hold, Gravitation und Timings gibt es hier nicht; es geht um reine Platzierungsstrategien.
+# Benötigt numpy (pip install numpy); das Spiel selbst braucht es nicht.
+
+import argparse
+import time
+
+import numpy as np
+
+from tetris_engine import SHAPES, ROTATIONS, ROTATION_WIDTHS, ROTATION_BOTTOMS
+
+# Zellen je Stein/Rotation als (dy, dx) -- jeder Tetromino hat genau 4 Zellen
+PIECE_DY = np.array([[[y for y, row in enumerate(rot) for cell in row if cell] for rot in rots]
+                     for rots in ROTATIONS], dtype=np.int64)
+PIECE_DX = np.array([[[x for row in rot for x, cell in enumerate(row) if cell] for rot in rots]
+                     for rots in ROTATIONS], dtype=np.int64)
+PIECE_WIDTH = np.array(ROTATION_WIDTHS, dtype=np.int64)
+# unterste Zelle je Spalte, auf 4 Spalten aufgefüllt (Füllwert fällt beim Minimum heraus)
+_NO_COLUMN = -(1 << 20)
+PIECE_BOTTOM = np.array([[bottoms + [_NO_COLUMN] * (4 - len(bottoms)) for bottoms in rots]
+                         for rots in ROTATION_BOTTOMS], dtype=np.int64)
+
+class BatchEngine:
+    def __init__(self, n, cols=10, rows=20, start_level=0, seed=None):
+        self.n = n
+        self.cols = cols
+        self.rows = rows
+        self.start_level = start_level
+        self.rng = np.random.default_rng(seed)
+        self.boards = np.zeros((n, rows, cols), dtype=np.bool_)
+        self.current = self._random_pieces(n)
+        self.next = self._random_pieces(n)
+        self.score = np.zeros(n, dtype=np.int64)
+        self.lines = np.zeros(n, dtype=np.int64)
+        self.pieces = np.zeros(n, dtype=np.int64)
+        self.level = np.full(n, start_level, dtype=np.int64)
+        self.alive = np.ones(n, dtype=np.bool_)
+        self.games_finished = 0
+
+    def _random_pieces(self, count):
+        return self.rng.integers(0, len(SHAPES), size=count)
+
+    def spawn_x(self, pieces):
+        # wie Tetromino: mittig über der Breite der Grundrotation
+        return self.cols // 2 - PIECE_WIDTH[pieces, 0] // 2
+
+    def _fits_at(self, idx, pieces, rotations, x, y):
+        # Kollision für die Felder idx; x/y sind linke obere Ecke des Steins
+        ys = y[:, None] + PIECE_DY[pieces, rotations]
+        xs = x[:, None] + PIECE_DX[pieces, rotations]
+        inside = (xs >= 0) & (xs < self.cols) & (ys < self.rows)
+        visible = ys >= 0
+        hit = self.boards[idx[:, None], np.clip(ys, 0, self.rows - 1), np.clip(xs, 0, self.cols - 1)] & visible
+        return inside.all(axis=1) & ~hit.any(axis=1)
+
+    def landing_y(self, idx, pieces, rotations, x):
+        # gerades Fallen ab Reihe 0: je Spalte die erste belegte Zelle unterhalb der untersten
+        # Steinzelle (berücksichtigt Überhänge, die der Stein bereits unterquert)
+        bottoms = PIECE_BOTTOM[pieces, rotations]
+        columns = np.clip(x[:, None] + np.arange(4), 0, self.cols - 1)
+        rows = np.arange(self.rows)
+        column_cells = self.boards[idx[:, None, None], rows[None, :, None], columns[:, None, :]]
+        below = column_cells & (rows[None, :, None] > bottoms[:, None, :])
+        first = np.where(below.any(axis=1), below.argmax(axis=1), self.rows)
+        return (first - bottoms - 1).min(axis=1)
+
+    def step(self, rotations, columns):
+        # platziert auf allen lebenden Feldern den aktuellen Stein; liefert gelöschte Reihen je Feld
+        rotations = np.asarray(rotations, dtype=np.int64) % 4
+        columns = np.asarray(columns, dtype=np.int64)
+        cleared = np.zeros(self.n, dtype=np.int64)
+        idx = np.flatnonzero(self.alive)
+        if idx.size == 0:
+            return cleared
+        pieces = self.current[idx]
+        rot = rotations[idx]
+        x = columns[idx]
+
+        # Platzierung muss im Feld liegen und oben einschwebbar sein; sonst ist die Partie vorbei
+        y = self.landing_y(idx, pieces, rot, x)
+        valid = ((x >= 0) & (x + PIECE_WIDTH[pieces, rot] <= self.cols)
+                 & self._fits_at(idx, pieces, rot, x, np.zeros_like(x)) & (y >= 0))
+        self.alive[idx[~valid]] = False
+        idx, pieces, rot, x, y = idx[valid], pieces[valid], rot[valid], x[valid], y[valid]
+
+        # einrasten
+        ys = y[:, None] + PIECE_DY[pieces, rot]
+        xs = x[:, None] + PIECE_DX[pieces, rot]
+        self.boards[idx[:, None], ys, xs] = True
+
+        # volle Reihen: volle zuerst (stabil sortiert), dann die obersten Reihen leeren
+        full = self.boards[idx].all(axis=2)
+        counts = full.sum(axis=1)
+        with_clear = counts > 0
+        if with_clear.any():
+            sub = idx[with_clear]
+            order = np.argsort(np.where(full[with_clear], -1, np.arange(self.rows)), axis=1, kind="stable")
+            compacted = np.take_along_axis(self.boards[sub], order[:, :, None], axis=1)
+            compacted[np.arange(self.rows)[None, :] < counts[with_clear][:, None]] = False
+            self.boards[sub] = compacted
+        cleared[idx] = counts
+
+        self.score[idx] += 10 + counts * 100
+        self.lines[idx] += counts
+        self.pieces[idx] += 1
+        self.level[idx] = self.start_level + self.score[idx] // 500
+
+        # nächster Stein; passt er nicht an die Spawn-Position, ist die Partie vorbei
+        self.current[idx] = self.next[idx]
+        self.next[idx] = self._random_pieces(idx.size)
+        spawned = self.current[idx]
+        fits = self._fits_at(idx, spawned, np.zeros_like(spawned), self.spawn_x(spawned), np.zeros_like(spawned))
+        self.alive[idx[~fits]] = False
+        return cleared
+
+    def reset_finished(self):
+        # beendete Partien mit leerem Feld neu starten (für Dauerläufe)
+        done = np.flatnonzero(~self.alive)
+        if done.size:
+            self.games_finished += done.size
+            self.boards[done] = False
+            self.current[done] = self._random_pieces(done.size)
+            self.next[done] = self._random_pieces(done.size)
+            self.score[done] = 0
+            self.lines[done] = 0
+            self.pieces[done] = 0
+            self.level[done] = self.start_level
+            self.alive[done] = True
+        return done
+
+    def random_placements(self):
+        # zufällige, innerhalb des Feldes liegende Rotation/Spalte je Feld
+        rotations = self.rng.integers(0, 4, size=self.n)
+        widths = PIECE_WIDTH[self.current, rotations]
+        columns = (self.rng.random(self.n) * (self.cols - widths + 1)).astype(np.int64)
+        return rotations, columns
+
+def main():
+    parser = argparse.ArgumentParser(description="Vectorized batch Tetris simulator (random placements)")
+    parser.add_argument("--boards", type=int, default=4096)
+    parser.add_argument("--steps", type=int, default=500)
+    parser.add_argument("--cols", type=int, default=10)
+    parser.add_argument("--rows", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    batch = BatchEngine(args.boards, args.cols, args.rows, seed=args.seed)
+    start = time.perf_counter()
+    for _ in range(args.steps):
+        batch.step(*batch.random_placements())
+        batch.reset_finished()
+    elapsed = time.perf_counter() - start
+    board_steps = args.boards * args.steps
+    print(f"{args.boards} boards x {args.steps} steps on {args.cols}x{args.rows}: {elapsed:.2f}s, "
+          f"{board_steps / elapsed:,.0f} board-steps/s, {batch.games_finished} games finished")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,438 @@
+# Benchmark-Suite für die heißen Pfade, drei Stufen:
+#   micro: Board.fits, Board.drop_y (ohne und mit Cache), Board.lock, clear_rows, Tetromino.rotate,
+#          load_leaderboard, draw_window, render_frame (GameRenderer mit scrollendem Viewport), dazu zum
+#          Vergleich die alten listenbasierten Funktionen (legacy_*: create_grid, valid_space, get_ghost_y)
+#   macro: ganze Partien (zufällige Eingaben bzw. Autoplayer)
+#   startup: Spielstart bis zum ersten Menübild (eigener Prozess mit --startup-time)
+# micro und macro jeweils für alle GRID_PRESETS plus übergroße Felder (100x200). draw_window zeichnet
+# in eine Offscreen-Surface unter SDL's Dummy-Videotreiber. Ergebnisse (Sekunden pro Operation) können
+# als Baseline gespeichert werden; beim Vergleich schlägt die Suite fehl, wenn ein Wert um mehr
+# als den Schwellwert langsamer ist.
+
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+import copy
+import importlib.util
+import json
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import pygame
+
+from tetris_engine import (GRID_PRESETS, ROTATIONS, PALETTE, Board, Tetromino, clear_rows,
+                           parse_size, simulate_random_game)
+from tetris_ai import play_game
+from tetris_leaderboard import LeaderboardStore
+
+BASELINE_FILE = "bench_baseline.json"
+DEFAULT_THRESHOLD = 0.25
+OVERSIZED = [(100, 200)]
+# zusätzlich im Speicherbericht
+STRESS_SIZES = [(1000, 1000)]
+# Prozessstarts je Startzeit-Messung (Bestwert zählt)
+STARTUP_RUNS = 5
+
+def load_game_module():
+    # das Spielskript hat ein Leerzeichen im Namen und lässt sich nur über importlib laden
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tetris v1.py")
+    spec = importlib.util.spec_from_file_location("tetris_game", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def set_grid(game, cols, rows):
+    # wie setup_game_window, nur ohne neues Fenster und ohne Zoom: das ganze Feld in voller Zellgröße
+    game.GRID_SIZE = game.MAX_GRID_SIZE
+    game.COLUMNS, game.ROWS = cols, rows
+    game.SCREEN_WIDTH, game.SCREEN_HEIGHT = cols * game.GRID_SIZE, rows * game.GRID_SIZE
+    game.SIDEBAR_WIDTH = max(120, min(300, game.SCREEN_WIDTH // 5))
+
+def half_filled_board(cols, rows, seed=0):
+    # zufällig gestapeltes Feld bis zur halben Höhe (mit Löchern und Überhängen)
+    rng = random.Random(seed)
+    board = Board(cols, rows)
+    while min(board.heights) > rows // 2:
+        piece = Tetromino(rng.randrange(len(ROTATIONS)), cols)
+        for _ in range(rng.randrange(4)):
+            piece.rotate()
+        piece.x = rng.randrange(cols - len(piece.shape[0]) + 1)
+        piece.y = board.drop_y(piece.index, piece.rotation, piece.x, 0)
+        clear_rows(board, board.lock(piece))
+    return board
+
+def measure(setup, run, ops, min_time, max_repeat=50):
+    # kleinste Zeit pro Operation über mehrere Wiederholungen; setup läuft außerhalb der Messung
+    best = None
+    spent = 0.0
+    repeats = 0
+    while repeats < 3 or (spent < min_time and repeats < max_repeat):
+        state = setup()
+        start = time.perf_counter()
+        run(state)
+        elapsed = time.perf_counter() - start
+        spent += elapsed
+        repeats += 1
+        if best is None or elapsed < best:
+            best = elapsed
+    return best / ops
+
+def micro_benchmarks(game, cols, rows):
+    set_grid(game, cols, rows)
+    board = half_filled_board(cols, rows)
+    # create_grid/valid_space/get_ghost_y sind die listenbasierten Referenzfunktionen (nicht mehr im Spiel)
+    grid = board.to_grid()
+    locked = {(x, y): color for y, row in enumerate(grid) for x, color in enumerate(row) if color != (0, 0, 0)}
+    none = lambda: None
+
+    # Kollisionsfälle: jede Rotation in jeder Spalte, auf der Landereihe (frei) und eine darunter (belegt)
+    cases = []
+    drops = []
+    # dieselben Fälle für das Bitboard: (index, rotation, x, y)
+    fits_cases = []
+    drop_cases = []
+    for index, rots in enumerate(ROTATIONS):
+        for rotation, shape in enumerate(rots):
+            for x in range(cols - len(shape[0]) + 1):
+                landing = board.drop_y(index, rotation, x, 0)
+                cases.append((shape, (x, landing)))
+                cases.append((shape, (x, landing + 1)))
+                drops.append((shape, x))
+                fits_cases.append((index, rotation, x, landing))
+                fits_cases.append((index, rotation, x, landing + 1))
+                drop_cases.append((index, rotation, x, 0))
+
+    def run_fits(state):
+        fits = board.fits
+        for index, rotation, x, y in fits_cases:
+            fits(index, rotation, x, y)
+
+    def run_drop(state):
+        # jede Stellung einmal: der Cache greift nie
+        drop_y = board.drop_y
+        for index, rotation, x, y in drop_cases:
+            drop_y(index, rotation, x, y)
+
+    cached_drops = 1000
+
+    def run_drop_cached(state):
+        # Ghost im Spiel: dieselbe Stellung Frame für Frame auf unverändertem Board
+        drop_y = board.drop_y
+        index, rotation, x, y = drop_cases[len(drop_cases) // 2]
+        for _ in range(cached_drops):
+            drop_y(index, rotation, x, y)
+
+    # Board.lock: eine feste Folge von Steinen samt Löschen voller Reihen, wie in der Engine
+    # (Landeplätze vorab auf einer Kopie bestimmt, gemessen wird auf frischen Kopien)
+    lock_pieces = []
+    scratch = copy.deepcopy(board)
+    rng = random.Random(1)
+    for _ in range(min(50, rows)):
+        piece = Tetromino(rng.randrange(len(ROTATIONS)), cols)
+        piece.x = rng.randrange(cols - len(piece.shape[0]) + 1)
+        piece.y = scratch.drop_y(piece.index, piece.rotation, piece.x, 0)
+        if not scratch.fits(piece.index, piece.rotation, piece.x, piece.y):
+            break
+        clear_rows(scratch, scratch.lock(piece))
+        lock_pieces.append(piece)
+    lock_boards = 5
+
+    def setup_lock():
+        return [copy.deepcopy(board) for _ in range(lock_boards)]
+
+    def run_lock(boards):
+        for b in boards:
+            for piece in lock_pieces:
+                clear_rows(b, b.lock(piece))
+
+    def run_valid_space(state):
+        valid_space = game.valid_space
+        for shape, offset in cases:
+            valid_space(shape, grid, offset)
+
+    def run_ghost(state):
+        get_ghost_y = game.get_ghost_y
+        for shape, x in drops:
+            get_ghost_y(shape, grid, x, 0)
+
+    # clear_rows: frische Kopien mit vier vollen Reihen unten
+    clear_boards = 20
+    full = (1 << cols) - 1
+
+    def setup_clear():
+        boards = []
+        for _ in range(clear_boards):
+            b = copy.deepcopy(board)
+            b.cells[(rows - 4) * cols:] = bytes((1,)) * (4 * cols)
+            for y in range(rows - 4, rows):
+                b.row_bits[y] = full
+                b.row_fill[y] = cols
+            boards.append(b)
+        return boards
+
+    def run_clear(boards):
+        for b in boards:
+            clear_rows(b)
+
+    piece = Tetromino(2, cols)
+    rotations = 1000
+
+    def run_rotate(state):
+        rotate = piece.rotate
+        for _ in range(rotations):
+            rotate()
+
+    surface = pygame.Surface((game.SCREEN_WIDTH + game.SIDEBAR_WIDTH, game.SCREEN_HEIGHT))
+    current = Tetromino(0, cols)
+    next_piece = Tetromino(1, cols)
+
+    def run_draw(state):
+        game.draw_window(surface, board, 12345, 3, next_piece, 4, current)
+
+    # ein Frame im Spielfenster, wie setup_game_window es für FALLBACK_DESKTOP anlegt: der Stein
+    # fällt und wandert über die ganze Breite (Viewport scrollt), alle 50 Frames ändert sich das Board
+    frames = 200
+
+    def setup_render():
+        size = game.layout_window(cols, rows, game.FALLBACK_DESKTOP)
+        renderer = game.GameRenderer(pygame.Surface(size), copy.deepcopy(board))
+        return renderer, Tetromino(0, cols)
+
+    def run_render(state):
+        renderer, piece = state
+        for i in range(frames):
+            piece.x = i * 7 % (cols - 3)
+            piece.y = i % (rows // 2)
+            if i % 50 == 0:
+                renderer.board.version += 1
+            renderer.draw(12345, 3, next_piece, 4, piece)
+
+    return [
+        ("Board.fits", none, run_fits, len(fits_cases)),
+        ("Board.drop_y", none, run_drop, len(drop_cases)),
+        ("Board.drop_y_cached", none, run_drop_cached, cached_drops),
+        ("Board.lock", setup_lock, run_lock, lock_boards * len(lock_pieces)),
+        ("clear_rows", setup_clear, run_clear, clear_boards),
+        ("legacy_create_grid", none, lambda state: game.create_grid(locked), 1),
+        ("legacy_valid_space", none, run_valid_space, len(cases)),
+        ("legacy_get_ghost_y", none, run_ghost, len(drops)),
+        ("Tetromino.rotate", none, run_rotate, rotations),
+        ("draw_window", none, run_draw, 1),
+        # zuletzt: layout_window verstellt GRID_SIZE, set_grid setzt es für die nächste Größe zurück
+        ("render_frame", setup_render, run_render, frames),
+    ]
+
+def leaderboard_benchmark(game, entries=100000):
+    # eigene Datenbank, nicht die des Spielers; gemessen wird die Abfrage ohne Cache
+    handle, path = tempfile.mkstemp(suffix=".db")
+    os.close(handle)
+    store = LeaderboardStore(path)
+    store.add_many((f"Player {i}", i * 37 % 100003, *GRID_PRESETS[i % len(GRID_PRESETS)]) for i in range(entries))
+    store.close()
+    game.LEADERBOARD_DB = path
+    game._leaderboard = None
+    cols, rows = GRID_PRESETS[0]
+
+    def run(state):
+        game.get_leaderboard().invalidate()
+        game.load_leaderboard(cols, rows)
+
+    return ("load_leaderboard", lambda: None, run, 1), path
+
+def macro_benchmarks(cols, rows, games=3, ai_pieces=30):
+    # Zeit pro gespieltem Stein über ganze Partien
+    def run_random(state):
+        state['pieces'] = sum(simulate_random_game(cols, rows, seed=seed).pieces for seed in range(games))
+
+    def run_ai(state):
+        state['pieces'] = play_game(cols, rows, seed=0, max_pieces=ai_pieces).pieces
+
+    return [
+        ("random_game_per_piece", run_random),
+        ("autoplayer_per_piece", run_ai),
+    ]
+
+def startup_benchmark(runs=STARTUP_RUNS):
+    # Spiel als eigener Prozess bis zum ersten Menübild: Wandzeit ab Prozessstart (inkl. Interpreter)
+    # bis zur Meldung, dazu die vom Skript gemessenen Abschnitte; je Wert der beste Lauf.
+    # Eigenes Arbeitsverzeichnis, damit die Leaderboard-Datenbank des Spielers unberührt bleibt
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tetris v1.py")
+    env = dict(os.environ, PYGAME_HIDE_SUPPORT_PROMPT="1")
+    best = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for _ in range(runs):
+            start = time.perf_counter()
+            process = subprocess.Popen([sys.executable, path, "--startup-time"], stdout=subprocess.PIPE,
+                                       text=True, cwd=workdir, env=env)
+            timings = None
+            for line in process.stdout:
+                if line.startswith("startup "):
+                    shown = time.perf_counter()
+                    timings = {key: float(value) / 1000 for key, value in
+                               (item.split("=") for item in line.split()[1:])}
+                    timings['first_menu_frame'] = shown - start
+                    break
+            process.stdout.close()
+            if process.wait() != 0 or timings is None:
+                raise RuntimeError("game did not report its startup time")
+            for key, seconds in timings.items():
+                best[key] = min(best.get(key, seconds), seconds)
+    # imports/init: im Prozess gemessen; menu = erstes Bild ab Skriptstart
+    return [(key, best[key]) for key in ("imports", "init", "menu", "first_menu_frame")]
+
+def run_suite(args):
+    results = {}
+    sizes = GRID_PRESETS + OVERSIZED if args.sizes == "presets" else [parse_size(s) for s in args.sizes.split(",")]
+
+    def report(key, seconds):
+        results[key] = seconds
+        print(f"{key:<44} {seconds * 1e6:>12.2f} us/op", flush=True)
+
+    def wanted(key):
+        return args.filter is None or args.filter in key
+
+    if args.tier in ("micro", "all"):
+        pygame.display.init()
+        pygame.font.init()
+        pygame.display.set_mode((1, 1))
+        game = load_game_module()
+        game.load_fonts()
+        game.GHOST_ENABLED = True
+        bench, path = leaderboard_benchmark(game)
+        try:
+            name, setup, run, ops = bench
+            if wanted(f"micro/{name}"):
+                report(f"micro/{name}", measure(setup, run, ops, args.min_time))
+        finally:
+            game.get_leaderboard().close()
+            os.remove(path)
+        for cols, rows in sizes:
+            for name, setup, run, ops in micro_benchmarks(game, cols, rows):
+                key = f"micro/{name}/{cols}x{rows}"
+                if wanted(key):
+                    report(key, measure(setup, run, ops, args.min_time))
+        pygame.quit()
+
+    if args.tier in ("macro", "all"):
+        for cols, rows in sizes:
+            for name, run in macro_benchmarks(cols, rows):
+                key = f"macro/{name}/{cols}x{rows}"
+                if not wanted(key):
+                    continue
+                # Anzahl Steine steht erst nach dem Lauf fest: einmal messen, Zeit pro Stein
+                state = {}
+                start = time.perf_counter()
+                run(state)
+                elapsed = time.perf_counter() - start
+                best = elapsed / max(state['pieces'], 1)
+                while elapsed < args.min_time * 4:
+                    start = time.perf_counter()
+                    run(state)
+                    lap = time.perf_counter() - start
+                    elapsed += lap
+                    best = min(best, lap / max(state['pieces'], 1))
+                report(key, best)
+
+    if args.tier in ("startup", "all") and wanted("startup"):
+        for name, seconds in startup_benchmark():
+            key = f"startup/{name}"
+            if wanted(key):
+                report(key, seconds)
+    return results
+
+def allocated(build):
+    # von build() belegter und noch gehaltener Speicher in Bytes
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = build()
+        size = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    return size, result
+
+def memory_report(sizes):
+    # altes Layout (create_grid: Listen von Farbtupeln + locked_positions-Dict) gegen das Board
+    # (Farbindex-bytearray + Bitboard), jeweils bei halb gefülltem Feld
+    game = load_game_module()
+    print(f"{'size':>10} {'cells':>9} {'grid B/cell':>12} {'locked B/cell':>14} {'board B/cell':>13} {'ratio':>7}")
+    for cols, rows in sizes:
+        set_grid(game, cols, rows)
+        board = half_filled_board(cols, rows)
+        cells = cols * rows
+        locked_bytes, locked = allocated(lambda: {(x, y): PALETTE[board.color_index(x, y)]
+                                                  for y in range(rows) for x in range(cols) if board.color_index(x, y)})
+        grid_bytes, _ = allocated(lambda: game.create_grid(locked))
+        board_bytes, _ = allocated(lambda: copy.deepcopy(board))
+        old = grid_bytes + locked_bytes
+        print(f"{cols}x{rows:<6} {cells:>9} {grid_bytes / cells:>12.1f} {locked_bytes / cells:>14.1f} "
+              f"{board_bytes / cells:>13.2f} {old / board_bytes:>6.0f}x")
+
+def compare(results, baseline, threshold):
+    # liefert die Schlüssel, die um mehr als threshold langsamer als die Baseline sind
+    regressions = []
+    print(f"\n{'benchmark':<44} {'baseline':>12} {'now':>12} {'change':>8}")
+    for key, seconds in results.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+        change = seconds / base - 1
+        flag = ""
+        if change > threshold:
+            regressions.append(key)
+            flag = "  REGRESSION"
+        print(f"{key:<44} {base * 1e6:>10.2f}us {seconds * 1e6:>10.2f}us {change:>+7.0%}{flag}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro and macro benchmarks for the Tetris hot paths")
+    parser.add_argument("--tier", choices=("micro", "macro", "startup", "all"), default="all")
+    parser.add_argument("--sizes", default="presets", help="'presets' (GRID_PRESETS + 100x200) or e.g. 10x20,100x200")
+    parser.add_argument("--filter", help="only run benchmarks whose name contains this text")
+    parser.add_argument("--min-time", type=float, default=0.05, help="seconds of measurement per benchmark")
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--save", action="store_true", help="store the results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed slowdown against the baseline (0.25 = 25%%)")
+    parser.add_argument("--memory", action="store_true",
+                        help="print memory per cell of the old list layout and the board instead of timings")
+    args = parser.parse_args()
+
+    if args.memory:
+        memory_report(GRID_PRESETS + OVERSIZED + STRESS_SIZES if args.sizes == "presets" else
+                      [parse_size(s) for s in args.sizes.split(",")])
+        return
+
+    results = run_suite(args)
+    if args.save:
+        # bestehende Werte behalten, damit Teilläufe (--tier/--filter) die Baseline ergänzen
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)['results']
+        baseline.update(results)
+        with open(args.baseline, "w") as f:
+            json.dump({'python': platform.python_version(), 'pygame': pygame.version.ver,
+                       'machine': platform.machine(), 'results': baseline}, f, indent=2, sort_keys=True)
+        print(f"\nbaseline written to {args.baseline}")
+        return
+    if not os.path.exists(args.baseline):
+        print(f"\nno baseline at {args.baseline}; run with --save to create one")
+        return
+    with open(args.baseline) as f:
+        baseline = json.load(f)['results']
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} benchmark(s) slower than baseline by more than {args.threshold:.0%}")
+        sys.exit(1)
+    print("\nno regressions")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,546 @@
+# Spiellogik ohne pygame/tkinter: Board, Steine, Punkte, Level, Hold und Gravitation.
+# Das pygame-Frontend ("tetris v1.py") ist nur ein Client dieser Engine; sie lässt sich
+# ohne Display schrittweise mit abstrakten Aktionen und einem Zeitdelta (ms) simulieren.
+
+import random
+
+# Dauer der Flash-Animation beim Löschen von Reihen in ms
+LINE_CLEAR_MS = 150
+# feste Schrittweite der Spiellogik in ms (alle Fall- und Shift-Intervalle sind Vielfache davon)
+TICK_MS = 10
+# längster Frame, der nachgeholt wird; danach wird Zeit verworfen statt immer weiter zurückzufallen
+MAX_FRAME_MS = 250
+
+# Grid presets: (cols, rows)
+GRID_PRESETS = [
+    (10, 20),  # standard
+    (10, 40),
+    (20, 40),
+    (40, 40)
+]
+# kleinste erlaubte Feldgröße für eigene Größen (der I-Stein muss liegend hineinpassen)
+MIN_COLUMNS = 4
+MIN_ROWS = 4
+FLASH_COLOR = (255, 255, 255)
+# Garbage-Reihen im Versus-Modus
+GARBAGE_COLOR = (110, 110, 110)
+
+SHAPES = [
+    [[1, 1, 1, 1]],  # I
+    [[1, 1, 1], [0, 1, 0]],  # T
+    [[1, 1, 0], [0, 1, 1]],  # S
+    [[0, 1, 1], [1, 1, 0]],  # Z
+    [[1, 1, 1], [1, 0, 0]],  # L
+    [[1, 1, 1], [0, 0, 1]],  # J
+    [[1, 1], [1, 1]]  # O
+]
+COLORS = [
+    (0, 255, 255),  # I - Cyan
+    (128, 0, 128),  # T - Purple
+    (0, 255, 0),    # S - Green
+    (255, 0, 0),    # Z - Red
+    (255, 165, 0),  # L - Orange
+    (0, 0, 255),    # J - Blue
+    (255, 255, 0)   # O - Yellow
+]
+
+# Farbindex je Zelle im Board: 0 = leer, 1..7 = COLORS, FLASH = Flash-Animation, danach Garbage
+EMPTY = 0
+FLASH = len(COLORS) + 1
+GARBAGE_CELL = FLASH + 1
+PALETTE = [(0, 0, 0)] + COLORS + [FLASH_COLOR, GARBAGE_COLOR]
+
+def rotate_shape(shape):
+    return [list(row) for row in zip(*shape[::-1])]
+
+# Alle 4 Rotationen je Stein vorberechnet (Index = Anzahl Drehungen im Uhrzeigersinn)
+ROTATIONS = []
+for _shape in SHAPES:
+    _rots = [_shape]
+    for _ in range(3):
+        _rots.append(rotate_shape(_rots[-1]))
+    ROTATIONS.append(_rots)
+
+# Bitmasken je Zeile der Rotation (Bit x = Spalte x) und Breite der Rotation
+ROTATION_MASKS = [[[sum(1 << x for x, cell in enumerate(row) if cell) for row in rot] for rot in rots]
+                  for rots in ROTATIONS]
+ROTATION_WIDTHS = [[len(rot[0]) for rot in rots] for rots in ROTATIONS]
+# unterste belegte Zeile je Spalte der Rotation (für die Landeposition über die Skyline)
+ROTATION_BOTTOMS = [[[max(y for y, row in enumerate(rot) if row[x]) for x in range(len(rot[0]))] for rot in rots]
+                    for rots in ROTATIONS]
+
+class Tetromino:
+    def __init__(self, index, cols):
+        self.index = index
+        self.rotation = 0
+        self.shape = ROTATIONS[index][0]
+        self.color = COLORS[index]
+        self.x = cols // 2 - len(self.shape[0]) // 2
+        self.y = 0
+
+    def rotate(self):
+        self.rotation = (self.rotation + 1) % 4
+        self.shape = ROTATIONS[self.index][self.rotation]
+
+class Board:
+    # Persistentes Spielfeld: wird nur beim Einrasten und Zeilenlöschen verändert
+    def __init__(self, cols, rows):
+        self.cols = cols
+        self.rows = rows
+        # Farbindex (PALETTE) je Zelle, zeilenweise: ein Byte pro Zelle
+        self.cells = bytearray(cols * rows)
+        # Kollisions-Bitboard: eine Ganzzahl pro Reihe, Bit x gesetzt = Zelle belegt
+        self.row_bits = [0] * rows
+        # Füllstand je Reihe, damit volle Reihen ohne Scan erkannt werden
+        self.row_fill = [0] * rows
+        # Skyline: oberste belegte Reihe je Spalte (rows = Spalte leer)
+        self.heights = [rows] * cols
+        # Version wird bei jeder Änderung erhöht; Landeposition wird pro Stellung gecacht
+        self.version = 0
+        self._drop_key = None
+        self._drop_y = 0
+
+    def lock(self, piece):
+        # setzt den Stein ins Feld und gibt die dadurch vollen Reihen zurück
+        touched = set()
+        for y, row in enumerate(piece.shape):
+            for x, cell in enumerate(row):
+                # cells above the visible board are dropped, like create_grid did
+                if cell and piece.y + y >= 0:
+                    self.cells[(piece.y + y) * self.cols + piece.x + x] = piece.index + 1
+                    self.row_bits[piece.y + y] |= 1 << (piece.x + x)
+                    self.row_fill[piece.y + y] += 1
+                    touched.add(piece.y + y)
+                    if piece.y + y < self.heights[piece.x + x]:
+                        self.heights[piece.x + x] = piece.y + y
+        self.version += 1
+        return sorted(y for y in touched if self.row_fill[y] == self.cols)
+
+    def fits(self, index, rotation, x, y):
+        # Bitboard-Gegenstück zu valid_space
+        masks = ROTATION_MASKS[index][rotation]
+        if x < 0 or x + ROTATION_WIDTHS[index][rotation] > self.cols or y + len(masks) > self.rows:
+            return False
+        bits = self.row_bits
+        for dy, mask in enumerate(masks):
+            if y + dy >= 0 and bits[y + dy] & (mask << x):
+                return False
+        return True
+
+    def drop_y(self, index, rotation, x, y):
+        # tiefste gültige y-Position beim geraden Fallenlassen (Ghost / Hard Drop)
+        key = (index, rotation, x, y, self.version)
+        if key == self._drop_key:
+            return self._drop_y
+        landing = None
+        if 0 <= x and x + ROTATION_WIDTHS[index][rotation] <= self.cols:
+            # liegt der Stein in jeder Spalte über der Skyline, ergibt sich die Landung direkt
+            landing = self.rows
+            for dx, bottom in enumerate(ROTATION_BOTTOMS[index][rotation]):
+                top = self.heights[x + dx]
+                if y + bottom >= top:
+                    # unter einem Überhang (oder bereits kollidierend): Fallback auf Bitboard-Probing
+                    landing = None
+                    break
+                if top - bottom - 1 < landing:
+                    landing = top - bottom - 1
+        if landing is None:
+            landing = y
+            while self.fits(index, rotation, x, landing + 1):
+                landing += 1
+        self._drop_key = key
+        self._drop_y = landing
+        return landing
+
+    def color_index(self, x, y):
+        return self.cells[y * self.cols + x]
+
+    def row(self, y, start=0, stop=None):
+        # Farbindizes einer Reihe (Kopie), optional nur die Spalten start..stop-1
+        offset = y * self.cols
+        return self.cells[offset + start:offset + (self.cols if stop is None else stop)]
+
+    def load_cells(self, cells):
+        # Zellen übernehmen (z.B. aus einem Spielstand) und Bitboard, Füllstand und Skyline daraus aufbauen
+        cols = self.cols
+        self.cells[:] = cells
+        self.row_bits = [sum(1 << x for x, index in enumerate(self.row(y)) if index) for y in range(self.rows)]
+        self.row_fill = [cols - self.cells.count(EMPTY, y * cols, (y + 1) * cols) for y in range(self.rows)]
+        self._update_heights()
+        self.version += 1
+
+    def to_grid(self):
+        # altes Layout (Listen von Farbtupeln) für die listenbasierten Referenzfunktionen
+        return [[PALETTE[index] for index in self.row(y)] for y in range(self.rows)]
+
+    def full_rows(self):
+        return [y for y in range(self.rows) if self.row_fill[y] == self.cols]
+
+    def remove_rows(self, rows):
+        # ganze Reihen entfernen und oben leere Reihen einfügen
+        cols = self.cols
+        for y in sorted(rows, reverse=True):
+            del self.cells[y * cols:(y + 1) * cols]
+            del self.row_bits[y]
+            del self.row_fill[y]
+        self.cells[0:0] = bytes(cols * len(rows))
+        for _ in rows:
+            self.row_bits.insert(0, 0)
+            self.row_fill.insert(0, 0)
+        self._update_heights()
+        self.version += 1
+
+    def add_garbage(self, count, hole):
+        # count Reihen mit einer Lücke in Spalte hole unten einschieben; oben fallen ebenso viele
+        # heraus. False, wenn dabei belegte Zellen herausgeschoben werden (Top-out)
+        cols = self.cols
+        count = min(count, self.rows)
+        topped_out = any(self.row_fill[:count])
+        del self.cells[:count * cols]
+        del self.row_bits[:count]
+        del self.row_fill[:count]
+        row = bytearray((GARBAGE_CELL,)) * cols
+        row[hole] = EMPTY
+        self.cells += row * count
+        self.row_bits += [((1 << cols) - 1) & ~(1 << hole)] * count
+        self.row_fill += [cols - 1] * count
+        self._update_heights()
+        self.version += 1
+        return not topped_out
+
+    def _update_heights(self):
+        # Skyline von oben neu aufbauen; endet, sobald jede Spalte ihre Oberkante hat
+        heights = [self.rows] * self.cols
+        missing = (1 << self.cols) - 1
+        for y, bits in enumerate(self.row_bits):
+            hit = bits & missing
+            while hit:
+                low = hit & -hit
+                heights[low.bit_length() - 1] = y
+                hit ^= low
+            missing &= ~bits
+            if not missing:
+                break
+        self.heights = heights
+
+def flash_rows(board, rows):
+    # Flash effect before clearing: nur die Farben, Bits/Füllstand bleiben belegt
+    for y in rows:
+        board.cells[y * board.cols:(y + 1) * board.cols] = bytes((FLASH,)) * board.cols
+    board.version += 1
+
+def clear_rows(board, full_rows=None):
+    # full_rows kommt normalerweise direkt aus Board.lock (nur berührte Reihen)
+    if full_rows is None:
+        full_rows = board.full_rows()
+    if full_rows:
+        board.remove_rows(full_rows)
+    return len(full_rows)
+
+# Aktionen für TetrisEngine.step (Taste gedrückt / losgelassen bzw. einmalige Aktion)
+MOVE_LEFT = 'left'
+MOVE_RIGHT = 'right'
+RELEASE_LEFT = 'release_left'
+RELEASE_RIGHT = 'release_right'
+SOFT_DROP = 'soft_drop'
+RELEASE_SOFT_DROP = 'release_soft_drop'
+ROTATE = 'rotate'
+HARD_DROP = 'hard_drop'
+HOLD = 'hold'
+# einzelner Schritt ohne Auto-Shift der Engine (DAS/ARR macht dann der Aufrufer, z.B. tetris_input)
+SHIFT_LEFT = 'shift_left'
+SHIFT_RIGHT = 'shift_right'
+# eine Garbage-Reihe vom Gegner (Versus); wird beim nächsten Spawn unten eingeschoben
+GARBAGE = 'garbage'
+# Reihenfolge = Codes im Replay-Format; neue Aktionen nur hinten anfügen
+ACTIONS = (MOVE_LEFT, MOVE_RIGHT, RELEASE_LEFT, RELEASE_RIGHT, SOFT_DROP, RELEASE_SOFT_DROP,
+           ROTATE, HARD_DROP, HOLD, SHIFT_LEFT, SHIFT_RIGHT, GARBAGE)
+
+def parse_size(text):
+    # "COLSxROWS" -> (cols, rows); ValueError bei ungültiger oder zu kleiner Größe
+    cols, _, rows = text.lower().partition("x")
+    cols, rows = int(cols), int(rows)
+    if cols < MIN_COLUMNS or rows < MIN_ROWS:
+        raise ValueError(f"grid size {text} is smaller than {MIN_COLUMNS}x{MIN_ROWS}")
+    return cols, rows
+
+def fall_speed_for_level(level):
+    # Sekunden pro Reihe
+    return max(0.1, 0.5 - (level * 0.05))
+
+class TetrisEngine:
+    def __init__(self, cols=10, rows=20, start_level=0, seed=None):
+        self.cols = cols
+        self.rows = rows
+        self.start_level = start_level
+        # Seed pro Partie (für Replays); ohne Angabe zufällig gewählt
+        if seed is None:
+            seed = random.randrange(2 ** 32)
+        self.seed = seed
+        self.rng = random.Random(seed)
+        # Anzahl gezogener Steine: der Zustand des RNG hängt nur davon ab (Snapshots teilen ihn)
+        self.random_draws = 0
+        self._rng_state = None
+        self._rng_state_draws = None
+        self.board = Board(cols, rows)
+        self.current_piece = Tetromino(self._random_index(), cols)
+        self.next_piece = Tetromino(self._random_index(), cols)
+        self.fall_time = 0
+        self.score = 0
+        self.lines = 0
+        self.pieces = 0
+        self.level = start_level
+        self.fall_speed = fall_speed_for_level(self.level)
+        self.soft_drop = False
+        self.soft_drop_speed = 0.05
+        self.left_hold = False
+        self.right_hold = False
+        self.move_delay = 0.08
+        # ms seit dem letzten Auto-Shift (Rest wird mitgenommen)
+        self.move_time = 0
+        # Hold-Funktionalität
+        self.hold_shape_index = None
+        self.hold_used = False  # kann nur einmal pro erzeugtem Stein benutzt werden
+        # Reihen der laufenden Flash-Animation; solange gibt es keinen aktiven Stein
+        self.clearing_rows = []
+        self.clear_time = 0
+        # Versus: angekündigte und bisher insgesamt eingeschobene Garbage-Reihen
+        self.pending_garbage = 0
+        self.garbage_rows = 0
+        # Versus: Liste, an die jede Reihenlöschung einzeln angehängt wird (None = aus); kein Spielzustand
+        self.clear_log = None
+        self.game_over = False
+
+    def _random_index(self):
+        self.random_draws += 1
+        return self.rng.randrange(len(SHAPES))
+
+    def snapshot(self):
+        # kompakter, unveränderlicher Spielstand (Rewind, Speichern); restore() setzt ihn zurück.
+        # Die Zellen werden kopiert, die Bitboard-Ganzzahlen nur referenziert
+        if self._rng_state_draws != self.random_draws:
+            self._rng_state = self.rng.getstate()
+            self._rng_state_draws = self.random_draws
+        board = self.board
+        piece = self.current_piece
+        return (bytes(board.cells), tuple(board.row_bits), tuple(board.row_fill), tuple(board.heights),
+                None if piece is None else (piece.index, piece.rotation, piece.x, piece.y),
+                self.next_piece.index, self.hold_shape_index, self.hold_used,
+                self.score, self.lines, self.pieces, self.level,
+                self.fall_time, self.move_time, self.clear_time, tuple(self.clearing_rows),
+                self.soft_drop, self.left_hold, self.right_hold, self.game_over,
+                self.pending_garbage, self.garbage_rows, self.random_draws, self._rng_state)
+
+    def restore(self, state):
+        (cells, row_bits, row_fill, heights, piece, next_index, self.hold_shape_index, self.hold_used,
+         self.score, self.lines, self.pieces, self.level,
+         self.fall_time, self.move_time, self.clear_time, clearing_rows,
+         self.soft_drop, self.left_hold, self.right_hold, self.game_over,
+         self.pending_garbage, self.garbage_rows, random_draws, rng_state) = state
+        board = self.board
+        board.cells[:] = cells
+        board.row_bits = list(row_bits)
+        board.row_fill = list(row_fill)
+        board.heights = list(heights)
+        # neue Version: Renderer und Landepositions-Cache sehen das Board als geändert
+        board.version += 1
+        if piece is None:
+            self.current_piece = None
+        else:
+            index, rotation, x, y = piece
+            self.current_piece = Tetromino(index, self.cols)
+            self.current_piece.rotation = rotation
+            self.current_piece.shape = ROTATIONS[index][rotation]
+            self.current_piece.x = x
+            self.current_piece.y = y
+        self.next_piece = Tetromino(next_index, self.cols)
+        self.clearing_rows = list(clearing_rows)
+        self.fall_speed = fall_speed_for_level(self.level)
+        if random_draws != self.random_draws:
+            if rng_state is None:
+                # Spielstand ohne RNG-Zustand (Datei): aus Seed und Anzahl gezogener Steine nachziehen
+                self.rng.seed(self.seed)
+                self.random_draws = 0
+                while self.random_draws < random_draws:
+                    self._random_index()
+            else:
+                self.rng.setstate(rng_state)
+                self.random_draws = random_draws
+        # vorhandenen Zustand für die nächsten Snapshots weiterverwenden
+        self._rng_state = rng_state
+        self._rng_state_draws = random_draws if rng_state is not None else None
+
+    def step(self, dt, actions=()):
+        # dt in ms (im Spiel immer TICK_MS); Reihenfolge: Timer, die Aktionen dieses Schritts
+        # (Eingaben wirken vor der Gravitation), Auto-Shift, Gravitation, dann ggf. Spawn.
+        # Auto-Shift und Gravitation ziehen nur ihr Intervall ab und behalten den Rest,
+        # damit die Raten nicht von der Schrittweite abhängen.
+        if self.game_over:
+            return
+        self.fall_time += dt
+        self.move_time += dt
+        self.clear_time += dt
+
+        for action in actions:
+            self.apply(action)
+
+        piece = self.current_piece
+        if piece is not None and (self.left_hold or self.right_hold):
+            # links hat Vorrang, wenn beide gehalten werden
+            direction = -1 if self.left_hold else 1
+            move_delay = round(self.move_delay * 1000)
+            while self.move_time >= move_delay:
+                self.move_time -= move_delay
+                self._shift(direction)
+
+        fall_interval = round((self.soft_drop_speed if self.soft_drop else self.fall_speed) * 1000)
+        while piece is not None and self.fall_time >= fall_interval:
+            self.fall_time -= fall_interval
+            if self.board.fits(piece.index, piece.rotation, piece.x, piece.y + 1):
+                piece.y += 1
+            else:
+                self._lock()
+                piece = None
+
+        # Stein eingerastet: nach der Flash-Animation Reihen entfernen und nächsten Stein holen
+        if self.current_piece is None and (not self.clearing_rows or self.clear_time >= LINE_CLEAR_MS):
+            self._spawn()
+
+    def apply(self, action):
+        # Hold-Zustände auch während der Flash-Animation mitführen
+        if action == MOVE_LEFT:
+            self.left_hold = True
+            self.move_time = 0
+        elif action == MOVE_RIGHT:
+            self.right_hold = True
+            self.move_time = 0
+        elif action == SOFT_DROP:
+            self.soft_drop = True
+            # angesammelte Zeit der langsamen Gravitation nicht als Soft-Drop-Schub nachholen
+            self.fall_time = min(self.fall_time, round(self.soft_drop_speed * 1000))
+        elif action == RELEASE_LEFT:
+            self.left_hold = False
+        elif action == RELEASE_RIGHT:
+            self.right_hold = False
+        elif action == RELEASE_SOFT_DROP:
+            self.soft_drop = False
+        elif action == GARBAGE:
+            self.pending_garbage += 1
+        piece = self.current_piece
+        if piece is None or self.game_over:
+            return
+        if action in (MOVE_LEFT, SHIFT_LEFT):
+            self._shift(-1)
+        elif action in (MOVE_RIGHT, SHIFT_RIGHT):
+            self._shift(1)
+        elif action == ROTATE:
+            self._rotate()
+        elif action == HARD_DROP:
+            piece.y = self.board.drop_y(piece.index, piece.rotation, piece.x, piece.y)
+            self._lock()
+        elif action == HOLD:
+            self._hold()
+
+    def _shift(self, dx):
+        piece = self.current_piece
+        if self.board.fits(piece.index, piece.rotation, piece.x + dx, piece.y):
+            piece.x += dx
+
+    def _rotate(self):
+        # Drehen mit einfachem Wall-Kick (eine Spalte links, dann rechts)
+        piece = self.current_piece
+        rotation = (piece.rotation + 1) % 4
+        for dx in (0, -1, 1):
+            if self.board.fits(piece.index, rotation, piece.x + dx, piece.y):
+                piece.x += dx
+                piece.rotate()
+                return
+
+    def _hold(self):
+        piece = self.current_piece
+        if self.hold_shape_index is None:
+            # Leerer Hold: verschiebe aktuellen Stein in Hold und spawne Next
+            self.hold_shape_index = piece.index
+            self.current_piece = Tetromino(self.next_piece.index, self.cols)
+            self.next_piece = Tetromino(self._random_index(), self.cols)
+            self.hold_used = True
+        elif not self.hold_used:
+            # Tausch nur erlaubt, wenn noch nicht benutzt für diese Runde
+            self.hold_shape_index, index = piece.index, self.hold_shape_index
+            self.current_piece = Tetromino(index, self.cols)
+            self.hold_used = True
+
+    def _lock(self):
+        self.clearing_rows = self.board.lock(self.current_piece)
+        self.score += 10
+        self.pieces += 1
+        flash_rows(self.board, self.clearing_rows)
+        self.clear_time = 0
+        self.current_piece = None
+
+    def _spawn(self):
+        lines_cleared = clear_rows(self.board, self.clearing_rows)
+        self.clearing_rows = []
+        self.lines += lines_cleared
+        self.score += lines_cleared * 100
+        if lines_cleared and self.clear_log is not None:
+            self.clear_log.append(lines_cleared)
+        self.level = self.start_level + self.score // 500
+        self.fall_speed = fall_speed_for_level(self.level)
+        if self.pending_garbage:
+            self._insert_garbage()
+
+        self.current_piece = Tetromino(self.next_piece.index, self.cols)
+        self.next_piece = Tetromino(self._random_index(), self.cols)
+        self.fall_time = 0
+        # Neuer Stein aus Next: Hold wieder erlauben
+        self.hold_used = False
+        piece = self.current_piece
+        if not self.board.fits(piece.index, piece.rotation, piece.x, piece.y):
+            self.game_over = True
+
+    def _insert_garbage(self):
+        # alle angekündigten Reihen mit einer gemeinsamen Lücke; die Spalte hängt nur von Seed und
+        # bisheriger Garbage-Menge ab, Replays bleiben damit reproduzierbar
+        hole = random.Random(self.seed ^ (self.garbage_rows * 0x9E3779B1)).randrange(self.cols)
+        if not self.board.add_garbage(self.pending_garbage, hole):
+            self.game_over = True
+        self.garbage_rows += self.pending_garbage
+        self.pending_garbage = 0
+
+class TickAccumulator:
+    # Fester Zeitschritt: sammelt Frame-Zeit und liefert, wie viele Logikschritte fällig sind
+    def __init__(self, tick_ms=TICK_MS, max_frame_ms=MAX_FRAME_MS):
+        self.tick_ms = tick_ms
+        self.max_frame_ms = max_frame_ms
+        self.time = 0
+
+    def advance(self, frame_ms):
+        self.time += min(frame_ms, self.max_frame_ms)
+        ticks = self.time // self.tick_ms
+        self.time -= ticks * self.tick_ms
+        return ticks
+
+    def reset(self):
+        self.time = 0
+
+def simulate_random_game(cols=10, rows=20, seed=None, max_steps=100000, dt=16):
+    # Headless-Partie mit zufälligen Aktionen (z.B. zum Durchsatz-Testen)
+    engine = TetrisEngine(cols, rows, seed=seed)
+    rng = random.Random(seed)
+    choices = (MOVE_LEFT, MOVE_RIGHT, ROTATE, HARD_DROP, HOLD)
+    steps = 0
+    while not engine.game_over and steps < max_steps:
+        engine.step(dt, (rng.choice(choices),))
+        steps += 1
+    return engine
+
+if __name__ == "__main__":
+    import time
+    start = time.perf_counter()
+    games = 1000
+    total_pieces = 0
+    for seed in range(games):
+        total_pieces += simulate_random_game(seed=seed).pieces
+    elapsed = time.perf_counter() - start
+    print(f"{games} games, {total_pieces} pieces in {elapsed:.2f}s ({games / elapsed:.0f} games/s)")
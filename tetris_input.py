@@ -0,0 +1,88 @@
+# Eingabe-Subsystem ohne pygame: Tastenereignisse kommen mit Zeitstempel (ms) herein und werden
+# den Logikschritten zugeordnet. Links/Rechts bekommen eigenes DAS (Verzögerung bis zur
+# Wiederholung) und ARR (Wiederholrate); Wiederholungen liegen auf absoluten Zeitpunkten ab dem
+# Tastendruck und sind damit unabhängig von Frame- und Schrittlänge.
+
+from tetris_engine import SHIFT_LEFT, SHIFT_RIGHT
+
+LEFT = 'left'
+RIGHT = 'right'
+SHIFTS = {LEFT: SHIFT_LEFT, RIGHT: SHIFT_RIGHT}
+# Standard wie bisher: sofort ein Schritt, danach alle 80 ms
+DEFAULT_DAS_MS = 80
+DEFAULT_ARR_MS = 80
+# ARR 0 = sofort bis zur Wand; so viele Schritte werden dann auf einmal erzeugt
+INSTANT_SHIFTS = 64
+
+class InputHandler:
+    def __init__(self, das=None, arr=None, instant_shifts=INSTANT_SHIFTS):
+        self.das = {LEFT: DEFAULT_DAS_MS, RIGHT: DEFAULT_DAS_MS}
+        self.arr = {LEFT: DEFAULT_ARR_MS, RIGHT: DEFAULT_ARR_MS}
+        self.das.update(das or {})
+        self.arr.update(arr or {})
+        self.instant_shifts = instant_shifts
+        # gehaltene Richtungen in Drückreihenfolge; die zuletzt gedrückte wiederholt
+        self.held = []
+        self.next_repeat = None
+        # (Zeit, Aktion) noch nicht an die Engine gegebener Ereignisse
+        self.queue = []
+        # Zeitstempel echter Tastendrücke, die seit dem letzten take_stamps() ausgegeben wurden
+        self.stamps = []
+
+    def tap(self, action, t):
+        # einmalige Aktion (drehen, Hard Drop, Hold, Soft Drop an/aus)
+        self.queue.append((t, action, True))
+
+    def press(self, direction, t):
+        if direction in self.held:
+            return
+        self._schedule(t)
+        self.held.append(direction)
+        self.queue.append((t, SHIFTS[direction], True))
+        self.next_repeat = t + self.das[direction]
+
+    def release(self, direction, t):
+        if direction not in self.held:
+            return
+        # Wiederholungen bis zum Loslassen gehören noch dazu
+        self._schedule(t)
+        was_active = self.held[-1] == direction
+        self.held.remove(direction)
+        if was_active:
+            # die andere, noch gehaltene Richtung übernimmt mit frischem DAS
+            self.next_repeat = t + self.das[self.held[-1]] if self.held else None
+
+    def release_all(self, t):
+        for direction in list(self.held):
+            self.release(direction, t)
+
+    def _schedule(self, t):
+        # fällige Wiederholungen der aktiven Richtung bis einschließlich t in die Queue
+        if not self.held:
+            return
+        direction = self.held[-1]
+        arr = self.arr[direction]
+        while self.next_repeat is not None and self.next_repeat <= t:
+            if arr <= 0:
+                self.queue.extend([(self.next_repeat, SHIFTS[direction], False)] * self.instant_shifts)
+                self.next_repeat = None
+            else:
+                self.queue.append((self.next_repeat, SHIFTS[direction], False))
+                self.next_repeat += arr
+
+    def due(self, t):
+        # alle Aktionen mit Zeitpunkt <= t, zeitlich sortiert
+        self._schedule(t)
+        if not self.queue:
+            return []
+        self.queue.sort(key=lambda item: item[0])
+        split = 0
+        while split < len(self.queue) and self.queue[split][0] <= t:
+            split += 1
+        ready, self.queue = self.queue[:split], self.queue[split:]
+        self.stamps.extend(stamp for stamp, _, pressed in ready if pressed)
+        return [action for _, action, _ in ready]
+
+    def take_stamps(self):
+        stamps, self.stamps = self.stamps, []
+        return stamps
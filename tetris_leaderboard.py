@@ -0,0 +1,135 @@
+# Leaderboard in SQLite (nur Standardbibliothek): komplette Historie aller Partien, Top-N je
+# Feldgröße über den Index (cols, rows, score). Die alte leaderboard.txt wird beim ersten Öffnen
+# einmalig übernommen. Abfragen werden im Speicher gecacht; der Cache verfällt bei eigenen
+# Schreibzugriffen und wenn ein anderer Prozess etwas geschrieben hat (PRAGMA data_version).
+
+import os
+import sqlite3
+import sys
+import time
+
+SCHEMA_VERSION = 1
+
+def parse_leaderboard_line(line):
+    # "<score> <cols>x<rows> <name>" oder das alte "<score> <name>"; liefert (name, score, cols, rows) oder None
+    line = line.strip()
+    if not line:
+        return None
+    parts = line.split(' ', 2)
+    if len(parts) == 3 and 'x' in parts[1]:
+        score_str, size_str, name = parts
+        try:
+            cols_str, rows_str = size_str.split('x')
+            cols, rows = int(cols_str), int(rows_str)
+        except ValueError:
+            # kein Größenfeld, sondern Teil des Namens
+            cols = rows = None
+            score_str, name = line.split(' ', 1)
+    else:
+        parts = line.split(' ', 1)
+        if len(parts) != 2:
+            return None
+        score_str, name = parts
+        cols = rows = None
+    try:
+        score = int(score_str)
+    except ValueError:
+        score = 0
+    return name, score, cols, rows
+
+class LeaderboardStore:
+    def __init__(self, path, legacy_path=None):
+        self.path = path
+        self.conn = sqlite3.connect(path, timeout=10)
+        self._cache = {}
+        self._data_version = None
+        self._migrate(legacy_path)
+
+    def _migrate(self, legacy_path):
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        if version >= SCHEMA_VERSION:
+            return
+        with self.conn:
+            # Schreibsperre vor dem erneuten Prüfen: starten zwei Instanzen gleichzeitig,
+            # übernimmt nur eine die alte Textdatei
+            self.conn.execute("BEGIN IMMEDIATE")
+            if self.conn.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION:
+                return
+            self.conn.execute("""CREATE TABLE IF NOT EXISTS scores (
+                id INTEGER PRIMARY KEY,
+                name TEXT NOT NULL,
+                score INTEGER NOT NULL,
+                cols INTEGER,
+                rows INTEGER,
+                created REAL)""")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS scores_by_size ON scores (cols, rows, score DESC)")
+            # Top-N über alle Größen
+            self.conn.execute("CREATE INDEX IF NOT EXISTS scores_by_score ON scores (score DESC)")
+            if legacy_path and os.path.exists(legacy_path):
+                self.conn.executemany("INSERT INTO scores (name, score, cols, rows, created) VALUES (?, ?, ?, ?, NULL)",
+                                      read_legacy_file(legacy_path))
+            self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def add(self, name, score, cols=None, rows=None):
+        with self.conn:
+            self.conn.execute("INSERT INTO scores (name, score, cols, rows, created) VALUES (?, ?, ?, ?, ?)",
+                              (name, score, cols, rows, time.time()))
+        self.invalidate()
+
+    def add_many(self, entries):
+        # (name, score, cols, rows) in einer Transaktion
+        now = time.time()
+        with self.conn:
+            self.conn.executemany("INSERT INTO scores (name, score, cols, rows, created) VALUES (?, ?, ?, ?, ?)",
+                                  ((name, score, cols, rows, now) for name, score, cols, rows in entries))
+        self.invalidate()
+
+    def invalidate(self):
+        self._cache.clear()
+
+    def top(self, limit=5, cols=None, rows=None):
+        # beste Einträge als (name, score, cols, rows); ohne Größe über alle Partien
+        data_version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+        if data_version != self._data_version:
+            self.invalidate()
+            self._data_version = data_version
+        key = (limit, cols, rows)
+        entries = self._cache.get(key)
+        if entries is None:
+            if cols is None or rows is None:
+                cursor = self.conn.execute("SELECT name, score, cols, rows FROM scores ORDER BY score DESC, id LIMIT ?",
+                                           (limit,))
+            else:
+                cursor = self.conn.execute("SELECT name, score, cols, rows FROM scores WHERE cols = ? AND rows = ? "
+                                           "ORDER BY score DESC, id LIMIT ?", (cols, rows, limit))
+            entries = self._cache[key] = cursor.fetchall()
+        return entries
+
+    def best(self, cols=None, rows=None):
+        entries = self.top(1, cols, rows)
+        return entries[0][1] if entries else 0
+
+    def count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM scores").fetchone()[0]
+
+    def close(self):
+        self.conn.close()
+
+def read_legacy_file(path):
+    entries = []
+    with open(path, "r") as f:
+        for line in f:
+            entry = parse_leaderboard_line(line)
+            if entry is not None:
+                entries.append(entry)
+    return entries
+
+if __name__ == "__main__":
+    # python tetris_leaderboard.py [DB] [COLSxROWS]: Top 10 ausgeben
+    store = LeaderboardStore(sys.argv[1] if len(sys.argv) > 1 else "leaderboard.db")
+    cols = rows = None
+    if len(sys.argv) > 2:
+        cols, rows = (int(v) for v in sys.argv[2].lower().split("x"))
+    print(f"{store.count()} games")
+    for i, (name, score, c, r) in enumerate(store.top(10, cols, rows)):
+        print(f"{i + 1:>2}. {score:>8} {f'{c}x{r}' if c and r else '':>7} {name}")
@@ -0,0 +1,140 @@
+# Deterministische Replays: Seed + Eingabe-/Zeitstrom einer Partie aufzeichnen und wieder abspielen.
+# Eine Partie ist durch (Feldgröße, Startlevel, Seed) und die Folge von (dt, Aktionen) pro
+# Engine-Schritt vollständig bestimmt; das Abspielen ohne Rendering läuft so schnell wie die Engine.
+
+import struct
+import sys
+import time
+import zlib
+
+from tetris_engine import ACTIONS, TetrisEngine
+from tetris_storage import atomic_write
+
+REPLAY_MAGIC = b"TTRP"
+# Version 2: Logik in festen TICK_MS-Schritten mit Übertrag der Fall-/Shift-Zeit (Version-1-Replays
+# liefen mit Frame-dt und verworfenen Resten und lassen sich nicht exakt nachspielen)
+# Version 3: Aktionen wirken vor der Gravitation; Einzelschritte SHIFT_LEFT/SHIFT_RIGHT
+REPLAY_VERSION = 3
+# magic, version, cols, rows, start level, seed, dann Endstand: score, lines, pieces, steps
+_HEADER = struct.Struct("<4sBHHBQIIII")
+
+def _write_varint(out, value):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+def _read_varint(data, pos):
+    value = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+class Replay:
+    def __init__(self, cols, rows, start_level, seed, steps=None):
+        self.cols = cols
+        self.rows = rows
+        self.start_level = start_level
+        self.seed = seed
+        # Liste von (dt in ms, Tupel von Aktionen) je Engine-Schritt
+        self.steps = steps if steps is not None else []
+        # Endstand der aufgezeichneten Partie, zum Prüfen beim Abspielen
+        self.score = 0
+        self.lines = 0
+        self.pieces = 0
+
+    def new_engine(self):
+        return TetrisEngine(self.cols, self.rows, self.start_level, self.seed)
+
+    def to_bytes(self):
+        # je Schritt: varint dt, varint Anzahl Aktionen, 1 Byte je Aktion; danach zlib
+        stream = bytearray()
+        codes = {action: code for code, action in enumerate(ACTIONS)}
+        for dt, actions in self.steps:
+            _write_varint(stream, dt)
+            _write_varint(stream, len(actions))
+            stream.extend(codes[action] for action in actions)
+        header = _HEADER.pack(REPLAY_MAGIC, REPLAY_VERSION, self.cols, self.rows, self.start_level,
+                              self.seed, self.score, self.lines, self.pieces, len(self.steps))
+        return header + zlib.compress(bytes(stream), 9)
+
+    @classmethod
+    def from_bytes(cls, data):
+        (magic, version, cols, rows, start_level, seed,
+         score, lines, pieces, step_count) = _HEADER.unpack_from(data)
+        if magic != REPLAY_MAGIC or version != REPLAY_VERSION:
+            raise ValueError("not a replay file (or unsupported version)")
+        stream = zlib.decompress(data[_HEADER.size:])
+        steps = []
+        pos = 0
+        for _ in range(step_count):
+            dt, pos = _read_varint(stream, pos)
+            count, pos = _read_varint(stream, pos)
+            steps.append((dt, tuple(ACTIONS[code] for code in stream[pos:pos + count])))
+            pos += count
+        replay = cls(cols, rows, start_level, seed, steps)
+        replay.score, replay.lines, replay.pieces = score, lines, pieces
+        return replay
+
+    def save(self, path):
+        atomic_write(path, self.to_bytes())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            return cls.from_bytes(f.read())
+
+class ReplayRecorder:
+    # zeichnet jeden engine.step(dt, actions) einer laufenden Partie auf; replay setzt eine
+    # fortgesetzte Partie (Spielstand) mit den bisherigen Schritten fort
+    def __init__(self, engine, replay=None):
+        self.engine = engine
+        self.replay = replay if replay is not None else Replay(engine.cols, engine.rows, engine.start_level,
+                                                                engine.seed)
+
+    def record(self, dt, actions):
+        self.replay.steps.append((dt, tuple(actions)))
+
+    def truncate(self, steps):
+        # nach einem Rewind: zurückgespulte Schritte verwerfen
+        del self.replay.steps[steps:]
+
+    def finish(self):
+        replay = self.replay
+        replay.score = self.engine.score
+        replay.lines = self.engine.lines
+        replay.pieces = self.engine.pieces
+        return replay
+
+def play_fast(replay):
+    # so schnell wie möglich ohne Rendering; liefert die Engine nach dem letzten Schritt
+    engine = replay.new_engine()
+    step = engine.step
+    for dt, actions in replay.steps:
+        step(dt, actions)
+    return engine
+
+def matches(replay, engine):
+    return (engine.score, engine.lines, engine.pieces) == (replay.score, replay.lines, replay.pieces)
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("usage: python tetris_replay.py REPLAY_FILE")
+        sys.exit(2)
+    replay = Replay.load(sys.argv[1])
+    start = time.perf_counter()
+    engine = play_fast(replay)
+    elapsed = time.perf_counter() - start
+    game_ms = sum(dt for dt, _ in replay.steps)
+    print(f"{replay.cols}x{replay.rows} seed {replay.seed}: score {engine.score}, lines {engine.lines}, "
+          f"pieces {engine.pieces}")
+    print(f"{len(replay.steps)} steps in {elapsed * 1000:.1f} ms "
+          f"({len(replay.steps) / max(elapsed, 1e-9):.0f} steps/s, {game_ms / 1000 / max(elapsed, 1e-9):.0f}x real time)")
+    if not matches(replay, engine):
+        print(f"MISMATCH: recorded score {replay.score}, lines {replay.lines}, pieces {replay.pieces}")
+        sys.exit(1)
@@ -0,0 +1,147 @@
+# Spielstände: eine laufende Partie auf die Platte legen und später fortsetzen, sowie ein
+# Rewind-Puffer mit den letzten Sekunden. Beide arbeiten mit TetrisEngine.snapshot(): im Speicher
+# ein Tupel aus Zellbytes + Bitboard + Zählern (wenige Mikrosekunden), auf der Platte nur Zellen
+# und Zähler (zlib). Bitboard und RNG-Zustand werden beim Laden aus Zellen bzw. Seed und Anzahl
+# gezogener Steine neu aufgebaut.
+# Mitgespeichert wird das Replay bis zum Speicherzeitpunkt, damit die fortgesetzte Partie
+# weiterhin vollständig nachspielbar ist.
+
+import struct
+import sys
+import zlib
+from collections import deque
+
+from tetris_engine import Board, TetrisEngine
+from tetris_replay import Replay
+from tetris_storage import atomic_write
+
+SAVE_MAGIC = b"TTSV"
+# Version 2: angekündigte und eingeschobene Garbage-Reihen (Versus)
+SAVE_VERSION = 2
+# magic, version, cols, rows, start level, seed, Länge des komprimierten Zustands
+_HEADER = struct.Struct("<4sBHHBQI")
+# Stein vorhanden, index, rotation, x, y, next, hold (-1 = leer), hold benutzt, score, lines,
+# pieces, level, fall/move/clear time, soft drop, links, rechts, game over, angekündigte und
+# eingeschobene Garbage-Reihen, gezogene Steine, Anzahl Flash-Reihen
+_STATE = struct.Struct("<?BBhhBb?IIIHiii????HIIH")
+
+# Rewind: so viele Sekunden Spielzeit, ein Snapshot je Intervall, höchstens so viel Speicher
+REWIND_SECONDS = 10
+REWIND_INTERVAL_MS = 100
+REWIND_MAX_BYTES = 32 * 1024 * 1024
+
+class SaveState:
+    def __init__(self, cols, rows, start_level, seed, state, replay=None):
+        self.cols = cols
+        self.rows = rows
+        self.start_level = start_level
+        self.seed = seed
+        # TetrisEngine.snapshot()
+        self.state = state
+        self.replay = replay
+
+    @classmethod
+    def capture(cls, engine, replay=None):
+        if replay is not None:
+            # Kopie der Schritte, die Partie darf danach weiterlaufen
+            replay = Replay(replay.cols, replay.rows, replay.start_level, replay.seed, list(replay.steps))
+        return cls(engine.cols, engine.rows, engine.start_level, engine.seed, engine.snapshot(), replay)
+
+    def new_engine(self):
+        engine = TetrisEngine(self.cols, self.rows, self.start_level, self.seed)
+        engine.restore(self.state)
+        return engine
+
+    def to_bytes(self):
+        (cells, _, _, _, piece, next_index, hold_index, hold_used, score, lines, pieces, level,
+         fall_time, move_time, clear_time, clearing_rows, soft_drop, left_hold, right_hold, game_over,
+         pending_garbage, garbage_rows, random_draws, _) = self.state
+        index, rotation, x, y = piece or (0, 0, 0, 0)
+        body = _STATE.pack(piece is not None, index, rotation, x, y, next_index,
+                           -1 if hold_index is None else hold_index, hold_used, score, lines, pieces, level,
+                           fall_time, move_time, clear_time, soft_drop, left_hold, right_hold, game_over,
+                           pending_garbage, garbage_rows, random_draws, len(clearing_rows))
+        body += struct.pack(f"<{len(clearing_rows)}H", *clearing_rows)
+        body += cells
+        body = zlib.compress(body, 9)
+        header = _HEADER.pack(SAVE_MAGIC, SAVE_VERSION, self.cols, self.rows, self.start_level, self.seed, len(body))
+        return header + body + (self.replay.to_bytes() if self.replay is not None else b"")
+
+    @classmethod
+    def from_bytes(cls, data):
+        magic, version, cols, rows, start_level, seed, size = _HEADER.unpack_from(data)
+        if magic != SAVE_MAGIC or version != SAVE_VERSION:
+            raise ValueError("not a save file (or unsupported version)")
+        body = zlib.decompress(data[_HEADER.size:_HEADER.size + size])
+        (has_piece, index, rotation, x, y, next_index, hold_index, hold_used, score, lines, pieces, level,
+         fall_time, move_time, clear_time, soft_drop, left_hold, right_hold, game_over,
+         pending_garbage, garbage_rows, random_draws, clearing) = _STATE.unpack_from(body)
+        pos = _STATE.size
+        clearing_rows = struct.unpack_from(f"<{clearing}H", body, pos)
+        pos += 2 * clearing
+        board = Board(cols, rows)
+        board.load_cells(body[pos:pos + cols * rows])
+        state = (bytes(board.cells), tuple(board.row_bits), tuple(board.row_fill), tuple(board.heights),
+                 (index, rotation, x, y) if has_piece else None, next_index,
+                 None if hold_index < 0 else hold_index, hold_used, score, lines, pieces, level,
+                 fall_time, move_time, clear_time, clearing_rows, soft_drop, left_hold, right_hold, game_over,
+                 pending_garbage, garbage_rows, random_draws, None)
+        rest = data[_HEADER.size + size:]
+        replay = Replay.from_bytes(rest) if rest else None
+        return cls(cols, rows, start_level, seed, state, replay)
+
+    def save(self, path):
+        atomic_write(path, self.to_bytes())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            return cls.from_bytes(f.read())
+
+def snapshot_bytes(cols, rows):
+    # grobe Größe eines Snapshots im Speicher: Zellbytes + drei Tupel mit einem Zeiger je Reihe
+    return cols * rows + 3 * 8 * rows + 600
+
+class Rewind:
+    # Ringpuffer der letzten Spielstände: alle interval_ms Spielzeit ein Snapshot, die ältesten
+    # fallen heraus. Die Größe ist durch seconds und max_bytes begrenzt, Aufnehmen kostet
+    # einen Snapshot je Intervall und sonst nur eine Addition pro Schritt.
+    def __init__(self, cols, rows, seconds=REWIND_SECONDS, interval_ms=REWIND_INTERVAL_MS,
+                 max_bytes=REWIND_MAX_BYTES):
+        self.interval_ms = interval_ms
+        capacity = max(1, min(seconds * 1000 // interval_ms, max_bytes // snapshot_bytes(cols, rows)))
+        # Einträge (Marke, Snapshot); die Marke gibt der Aufrufer vor (z.B. Anzahl Replay-Schritte)
+        self.states = deque(maxlen=capacity)
+        self.elapsed = 0
+
+    def record(self, engine, dt, mark=None):
+        # nach jedem Engine-Schritt aufrufen
+        self.elapsed += dt
+        if self.elapsed >= self.interval_ms:
+            self.elapsed -= self.interval_ms
+            self.states.append((mark, engine.snapshot()))
+
+    def back(self, engine):
+        # ein Intervall zurück (nur bei nicht leerem Puffer); liefert die Marke des Snapshots
+        mark, state = self.states.pop()
+        engine.restore(state)
+        self.elapsed = 0
+        return mark
+
+    def clear(self):
+        self.states.clear()
+        self.elapsed = 0
+
+    def __len__(self):
+        return len(self.states)
+
+if __name__ == "__main__":
+    # python tetris_savestate.py SAVE_FILE: Inhalt eines Spielstands ausgeben
+    if len(sys.argv) < 2:
+        print("usage: python tetris_savestate.py SAVE_FILE")
+        sys.exit(2)
+    save = SaveState.load(sys.argv[1])
+    engine = save.new_engine()
+    game_ms = sum(dt for dt, _ in save.replay.steps) if save.replay is not None else 0
+    print(f"{save.cols}x{save.rows} seed {save.seed}: score {engine.score}, lines {engine.lines}, "
+          f"pieces {engine.pieces}, level {engine.level}, {game_ms / 1000:.1f}s recorded")
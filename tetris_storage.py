@@ -0,0 +1,76 @@
+# Dateizugriffe abseits der Spielschleife: ein Hintergrund-Thread arbeitet Schreibaufträge aus
+# einer Queue ab, damit UI und Spiel nie auf die Platte warten. Dateien werden über eine
+# temporäre Datei im selben Verzeichnis plus os.replace geschrieben (atomar: ein Absturz oder
+# eine zweite Instanz hinterlässt nie eine halb geschriebene Datei).
+
+import os
+import queue
+import stat
+import sys
+import tempfile
+import threading
+
+# umask nur einmal beim Import lesen: os.umask setzt sie prozessweit, im Writer-Thread wäre das ein Rennen
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+def file_mode(path):
+    # Rechte für die neue Datei: wie die vorhandene Zieldatei, sonst wie open() (0666 ohne umask);
+    # mkstemp legt sonst immer 0600 an
+    try:
+        return stat.S_IMODE(os.stat(path).st_mode)
+    except OSError:
+        return 0o666 & ~_UMASK
+
+def atomic_write(path, data):
+    directory = os.path.dirname(os.path.abspath(path))
+    handle, tmp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(path) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(handle, "wb") as f:
+            if hasattr(os, "fchmod"):
+                # nicht unter Windows (dort gibt es nur das Schreibschutz-Flag)
+                os.fchmod(f.fileno(), file_mode(path))
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+class BackgroundWriter:
+    def __init__(self, name="tetris-writer"):
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self.thread.start()
+
+    def submit(self, func, *args, on_done=None):
+        # func(*args) im Hintergrund ausführen; on_done() danach (ebenfalls im Writer-Thread)
+        self.queue.put((func, args, on_done))
+
+    def _run(self):
+        while True:
+            job = self.queue.get()
+            try:
+                if job is None:
+                    return
+                func, args, on_done = job
+                func(*args)
+                if on_done is not None:
+                    on_done()
+            except Exception as e:
+                # ein fehlgeschlagener Schreibauftrag darf das Spiel nicht beenden
+                print(f"background write failed: {e}", file=sys.stderr)
+            finally:
+                self.queue.task_done()
+
+    def flush(self):
+        # wartet, bis alle bisher eingereihten Aufträge erledigt sind
+        self.queue.join()
+
+    def close(self):
+        self.queue.put(None)
+        self.thread.join()
@@ -0,0 +1,174 @@
+# Turnier-/Soak-Test-Runner: viele geseedete Partien parallel über einen Prozess-Pool.
+# Jede Partie spielt entweder der Autoplayer oder ein aufgezeichnetes Replay (Eingabe-Trace);
+# gemessen werden Score, Reihen, Steine/s und die Dauer jedes einzelnen Engine-Schritts.
+# Die Worker liefern nur kleine Ergebnisse (Zahlen + Latenz-Histogramm), daher skaliert
+# der Durchsatz praktisch linear mit der Anzahl der Kerne.
+
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import sys
+import time
+from collections import Counter
+
+from tetris_engine import GRID_PRESETS, TICK_MS, TetrisEngine, parse_size
+from tetris_ai import AutoPlayer
+from tetris_replay import Replay, matches
+
+def percentile(histogram, fraction):
+    # Histogramm {Zehntel-Mikrosekunden: Anzahl} -> Wert in Mikrosekunden beim Anteil fraction
+    total = sum(histogram.values())
+    if not total:
+        return 0
+    wanted = fraction * total
+    seen = 0
+    for ticks in sorted(histogram):
+        seen += histogram[ticks]
+        if seen >= wanted:
+            return ticks / 10
+    return max(histogram) / 10
+
+def run_autoplayer_game(job):
+    cols, rows, seed, max_pieces, lookahead, dt = job
+    engine = TetrisEngine(cols, rows, seed=seed)
+    player = AutoPlayer(lookahead=lookahead)
+    latencies = Counter()
+    clock = time.perf_counter
+    start = clock()
+    while not engine.game_over and engine.pieces < max_pieces:
+        # Suche des Autoplayers außerhalb der Messung (eigene Spalte decision_mean_ms)
+        actions = player.actions(engine)
+        before = clock()
+        engine.step(dt, actions)
+        latencies[int((clock() - before) * 1e7)] += 1
+    elapsed = clock() - start
+    return _result("autoplayer", cols, rows, seed, engine, elapsed, latencies, True,
+                   player.decisions, player.decision_time)
+
+def run_replay_game(path):
+    replay = Replay.load(path)
+    engine = replay.new_engine()
+    latencies = Counter()
+    clock = time.perf_counter
+    start = clock()
+    for dt, actions in replay.steps:
+        before = clock()
+        engine.step(dt, actions)
+        latencies[int((clock() - before) * 1e7)] += 1
+    elapsed = clock() - start
+    return _result(os.path.basename(path), replay.cols, replay.rows, replay.seed, engine, elapsed, latencies,
+                   matches(replay, engine))
+
+def _result(source, cols, rows, seed, engine, elapsed, latencies, ok, decisions=0, decision_seconds=0.0):
+    return {
+        'source': source,
+        'cols': cols,
+        'rows': rows,
+        'seed': seed,
+        'score': engine.score,
+        'lines': engine.lines,
+        'pieces': engine.pieces,
+        'game_over': engine.game_over,
+        'seconds': elapsed,
+        'ok': ok,
+        'decisions': decisions,
+        'decision_seconds': decision_seconds,
+        'latencies': latencies,
+    }
+
+def summarize(results):
+    # je Feldgröße und gesamt: Mittelwerte, Steine/s (CPU-Zeit der Worker), Schritt-Latenzen der Engine
+    # und Rechenzeit des Autoplayers je Entscheidung
+    groups = {}
+    for result in results:
+        groups.setdefault(f"{result['cols']}x{result['rows']}", []).append(result)
+    if len(groups) > 1:
+        groups['all'] = results
+    summary = []
+    for size, games in groups.items():
+        histogram = Counter()
+        for game in games:
+            histogram.update(game['latencies'])
+        pieces = sum(game['pieces'] for game in games)
+        seconds = sum(game['seconds'] for game in games)
+        decisions = sum(game['decisions'] for game in games)
+        summary.append({
+            'size': size,
+            'games': len(games),
+            'failed': sum(1 for game in games if not game['ok']),
+            'game_overs': sum(1 for game in games if game['game_over']),
+            'mean_score': sum(game['score'] for game in games) / len(games),
+            'mean_lines': sum(game['lines'] for game in games) / len(games),
+            'pieces': pieces,
+            'pieces_per_s': pieces / seconds if seconds else 0.0,
+            'steps': sum(histogram.values()),
+            'step_p50_us': percentile(histogram, 0.5),
+            'step_p90_us': percentile(histogram, 0.9),
+            'step_p99_us': percentile(histogram, 0.99),
+            'step_max_us': max(histogram) / 10 if histogram else 0,
+            'decision_mean_ms': sum(game['decision_seconds'] for game in games) / decisions * 1000 if decisions else 0.0,
+        })
+    return summary
+
+def write_report(path, fmt, config, wall, summary, results):
+    if fmt == "csv":
+        with open(path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(summary[0]))
+            writer.writeheader()
+            writer.writerows(summary)
+        return
+    games = [{key: value for key, value in result.items() if key != 'latencies'} for result in results]
+    with open(path, "w") as f:
+        json.dump({'config': config, 'wall_seconds': wall, 'summary': summary, 'games': games}, f, indent=2)
+
+def main():
+    parser = argparse.ArgumentParser(description="Run many seeded Tetris games on all cores and report the results")
+    parser.add_argument("--games", type=int, default=100, help="autoplayer games per grid size")
+    parser.add_argument("--sizes", default="presets", help="'presets' or a list like 10x20,100x200")
+    parser.add_argument("--seed", type=int, default=0, help="first seed; game i uses seed + i")
+    parser.add_argument("--max-pieces", type=int, default=500)
+    parser.add_argument("--no-lookahead", action="store_true")
+    parser.add_argument("--replays", nargs="+", metavar="FILE", help="play these input traces instead of the autoplayer")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--out", help="report file (.json or .csv)")
+    parser.add_argument("--format", choices=("json", "csv"), help="default: from the --out extension")
+    args = parser.parse_args()
+
+    if args.replays:
+        worker, jobs = run_replay_game, list(args.replays)
+    else:
+        sizes = GRID_PRESETS if args.sizes == "presets" else [parse_size(s) for s in args.sizes.split(",")]
+        # Größen verschränken, damit lange Partien nicht alle am Ende im Pool landen
+        jobs = [(cols, rows, args.seed + game, args.max_pieces, not args.no_lookahead, TICK_MS)
+                for game in range(args.games) for cols, rows in sizes]
+        worker = run_autoplayer_game
+
+    start = time.perf_counter()
+    with multiprocessing.Pool(args.workers) as pool:
+        chunk = max(1, len(jobs) // (args.workers * 8))
+        results = list(pool.imap_unordered(worker, jobs, chunksize=chunk))
+    wall = time.perf_counter() - start
+    results.sort(key=lambda r: (r['cols'], r['rows'], r['seed'], r['source']))
+    summary = summarize(results)
+
+    total_pieces = sum(r['pieces'] for r in results)
+    print(f"{len(results)} games on {args.workers} workers in {wall:.1f}s ({total_pieces / wall:,.0f} pieces/s overall)")
+    for row in summary:
+        print(f"{row['size']:>8}: {row['games']} games, score {row['mean_score']:.0f}, lines {row['mean_lines']:.1f}, "
+              f"{row['pieces_per_s']:,.0f} pieces/s per worker, step p50/p99/max "
+              f"{row['step_p50_us']}/{row['step_p99_us']}/{row['step_max_us']} us"
+              + (f", {row['decision_mean_ms']:.2f} ms/decision" if row['decision_mean_ms'] else "")
+              + (f", {row['failed']} MISMATCHED" if row['failed'] else ""))
+
+    if args.out:
+        fmt = args.format or ("csv" if args.out.lower().endswith(".csv") else "json")
+        config = {key: value for key, value in vars(args).items() if key not in ("out", "format")}
+        write_report(args.out, fmt, config, wall, summary, results)
+        print(f"report written to {args.out}")
+    if any(not r['ok'] for r in results):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,626 @@
+# Versus-Modus über TCP (asyncio, nur Standardbibliothek): ein Relay-Server paart je zwei Clients,
+# jeder Client spielt seine Partie im eigenen Prozess. Übertragen werden nur Änderungen, höchstens
+# SYNC_HZ mal pro Sekunde: geänderte Reihen des Boards (ab COMPRESS_MIN Bytes mit zlib), die Stellung
+# des aktiven Steins und der Punktestand. Gelöschte Reihen meldet der Client dem Server, der sie dem
+# Gegner als Garbage-Reihen schickt; die landen als GARBAGE-Aktion in dessen Engine (und im Replay).
+# Beide Seiten führen Statistik über Bytes, Nachrichten, Logikschritte und Sync-Rate.
+
+import argparse
+import asyncio
+import multiprocessing
+import queue
+import random
+import struct
+import sys
+import threading
+import time
+import zlib
+
+from tetris_engine import GARBAGE, TICK_MS, Board, TetrisEngine, TickAccumulator, parse_size
+from tetris_ai import AutoPlayer
+
+DEFAULT_PORT = 7777
+DEFAULT_SIZE = (10, 20)
+# Zustandsabgleich pro Sekunde (Logik läuft unabhängig davon in TICK_MS-Schritten)
+SYNC_HZ = 60
+# gelöschte Reihen auf einmal -> Garbage-Reihen beim Gegner (mehr als 4: ebenso viele)
+GARBAGE_FOR_LINES = {1: 0, 2: 1, 3: 2, 4: 4}
+# Reihen-Deltas ab dieser Größe werden komprimiert
+COMPRESS_MIN = 256
+# Abstand der Statistikmeldungen in Sekunden
+STATS_INTERVAL = 5.0
+
+# Nachricht: Kopf (Typ, Länge der Nutzdaten), danach die Nutzdaten
+_FRAME = struct.Struct("<BH")
+MAX_PAYLOAD = 0xFFFF
+(MSG_HELLO, MSG_START, MSG_ROWS, MSG_ROWS_Z, MSG_PIECE, MSG_STATUS, MSG_LINES, MSG_GARBAGE,
+ MSG_GAME_OVER, MSG_STATS) = range(1, 11)
+# cols, rows, seed, Spielernummer; danach der Name des Gegners
+_START = struct.Struct("<HHQB")
+# je geänderter Reihe: y, danach cols Farbindizes
+_ROW = struct.Struct("<H")
+# index (NO_PIECE = kein Stein, z.B. während der Flash-Animation), rotation, x, y
+_PIECE = struct.Struct("<BBhh")
+NO_PIECE = 255
+# score, lines, level
+_STATUS = struct.Struct("<IIH")
+_COUNT = struct.Struct("<B")
+# Logikschritte/s, Syncs/s, ms je Sync, gesendete und empfangene Bytes
+_STATS = struct.Struct("<fffII")
+# vom Server weitergereichte Nachrichten (unverändert an den Gegner)
+RELAYED = (MSG_ROWS, MSG_ROWS_Z, MSG_PIECE, MSG_STATUS, MSG_GAME_OVER)
+
+def encode(msg_type, payload=b""):
+    return _FRAME.pack(msg_type, len(payload)) + payload
+
+async def read_message(reader):
+    msg_type, size = _FRAME.unpack(await reader.readexactly(_FRAME.size))
+    return msg_type, await reader.readexactly(size)
+
+def parse_address(text, default_host="127.0.0.1"):
+    # "host", "host:port" oder ":port"
+    host, _, port = text.rpartition(":") if ":" in text else (text, "", "")
+    return host or default_host, int(port) if port else DEFAULT_PORT
+
+class LinkStats:
+    # Bytes und Nachrichten je Richtung seit dem Start
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.bytes_out = 0
+        self.bytes_in = 0
+        self.msgs_out = 0
+        self.msgs_in = 0
+
+    def sent(self, size, count=1):
+        self.bytes_out += size
+        self.msgs_out += count
+
+    def received(self, size, count=1):
+        self.bytes_in += size
+        self.msgs_in += count
+
+    def elapsed(self):
+        return max(time.perf_counter() - self.start, 1e-9)
+
+    def summary(self):
+        elapsed = self.elapsed()
+        return (f"out {self.bytes_out / elapsed / 1024:.2f} kB/s ({self.msgs_out / elapsed:.0f} msg/s), "
+                f"in {self.bytes_in / elapsed / 1024:.2f} kB/s ({self.msgs_in / elapsed:.0f} msg/s)")
+
+class BoardSync:
+    # Sender: Spiegel des zuletzt gesendeten Zustands; liefert nur die Nachrichten für Änderungen
+    def __init__(self, cols, rows):
+        self.cols = cols
+        self.rows = rows
+        self.mirror = bytearray(cols * rows)
+        self.version = None
+        self.piece = None
+        self.status = None
+
+    def messages(self, engine):
+        out = []
+        board = engine.board
+        if board.version != self.version:
+            self.version = board.version
+            if board.cells != self.mirror:
+                out += self._row_messages(board.cells)
+        piece = engine.current_piece
+        state = (NO_PIECE, 0, 0, 0) if piece is None else (piece.index, piece.rotation, piece.x, piece.y)
+        if state != self.piece:
+            self.piece = state
+            out.append(encode(MSG_PIECE, _PIECE.pack(*state)))
+        status = (engine.score, engine.lines, engine.level)
+        if status != self.status:
+            self.status = status
+            out.append(encode(MSG_STATUS, _STATUS.pack(*status)))
+        return out
+
+    def _row_messages(self, cells):
+        cols = self.cols
+        mirror = self.mirror
+        out = []
+        payload = bytearray()
+        for y in range(self.rows):
+            start = y * cols
+            row = cells[start:start + cols]
+            if row == mirror[start:start + cols]:
+                continue
+            mirror[start:start + cols] = row
+            if len(payload) + _ROW.size + cols > MAX_PAYLOAD:
+                out.append(self._rows_message(payload))
+                payload = bytearray()
+            payload += _ROW.pack(y)
+            payload += row
+        if payload:
+            out.append(self._rows_message(payload))
+        return out
+
+    def _rows_message(self, payload):
+        if len(payload) >= COMPRESS_MIN:
+            packed = zlib.compress(bytes(payload), 1)
+            if len(packed) < len(payload):
+                return encode(MSG_ROWS_Z, packed)
+        return encode(MSG_ROWS, bytes(payload))
+
+class OpponentBoard:
+    # Empfänger: Board des Gegners aus den Reihen-Deltas, dazu Stein und Punktestand
+    def __init__(self, cols, rows, name):
+        self.board = Board(cols, rows)
+        self.name = name
+        # (index, rotation, x, y) oder None
+        self.piece = None
+        self.score = 0
+        self.lines = 0
+        self.level = 0
+        self.game_over = False
+        # wird bei jeder Änderung erhöht (Renderer)
+        self.version = 0
+
+    def apply(self, msg_type, payload):
+        if msg_type in (MSG_ROWS, MSG_ROWS_Z):
+            if msg_type == MSG_ROWS_Z:
+                payload = zlib.decompress(payload)
+            board = self.board
+            cols = board.cols
+            step = _ROW.size + cols
+            for pos in range(0, len(payload), step):
+                y, = _ROW.unpack_from(payload, pos)
+                row = payload[pos + _ROW.size:pos + step]
+                board.cells[y * cols:(y + 1) * cols] = row
+                board.row_fill[y] = cols - row.count(0)
+            board.version += 1
+        elif msg_type == MSG_PIECE:
+            index, rotation, x, y = _PIECE.unpack(payload)
+            self.piece = None if index == NO_PIECE else (index, rotation, x, y)
+        elif msg_type == MSG_STATUS:
+            self.score, self.lines, self.level = _STATUS.unpack(payload)
+        elif msg_type == MSG_GAME_OVER:
+            self.game_over = True
+        else:
+            return False
+        self.version += 1
+        return True
+
+class VersusClient:
+    # Verbindung in einem eigenen Thread mit asyncio-Loop: das Spiel (pygame oder Bot) liest
+    # empfangene Nachrichten mit poll() und schreibt mit send(), ohne je auf das Netz zu warten
+    def __init__(self, host, port, name):
+        self.inbox = queue.Queue()
+        self.stats = LinkStats()
+        self.error = None
+        self.closed = False
+        self.loop = asyncio.new_event_loop()
+        self._writer = None
+        self.thread = threading.Thread(target=self._run, args=(host, port, name), name="tetris-versus", daemon=True)
+        self.thread.start()
+
+    def _run(self, host, port, name):
+        try:
+            self.loop.run_until_complete(self._receive(host, port, name))
+        except (OSError, asyncio.IncompleteReadError) as e:
+            self.error = e
+        except asyncio.CancelledError:
+            # close()
+            pass
+        finally:
+            self.closed = True
+            # (None, None) = Verbindung beendet
+            self.inbox.put((None, None))
+            self.loop.close()
+
+    async def _receive(self, host, port, name):
+        reader, self._writer = await asyncio.open_connection(host, port)
+        self._write(encode(MSG_HELLO, name.encode("utf-8")[:64]))
+        try:
+            while True:
+                msg_type, payload = await read_message(reader)
+                self.stats.received(_FRAME.size + len(payload))
+                self.inbox.put((msg_type, payload))
+        finally:
+            self._writer.close()
+
+    def _write(self, data):
+        if self._writer is not None and not self._writer.is_closing():
+            self._writer.write(data)
+
+    def send(self, messages):
+        if not messages or self.closed:
+            return
+        data = b"".join(messages)
+        self.stats.sent(len(data), len(messages))
+        self.loop.call_soon_threadsafe(self._write, data)
+
+    def poll(self, timeout=None):
+        # alle bisher empfangenen Nachrichten; mit timeout höchstens so lange auf die erste warten
+        messages = []
+        try:
+            messages.append(self.inbox.get(timeout=timeout) if timeout else self.inbox.get_nowait())
+            while True:
+                messages.append(self.inbox.get_nowait())
+        except queue.Empty:
+            pass
+        return messages
+
+    def close(self):
+        if not self.closed:
+            try:
+                self.loop.call_soon_threadsafe(self._shutdown)
+            except RuntimeError:
+                # Loop ist schon beendet
+                pass
+        self.thread.join(1.0)
+
+    def _shutdown(self):
+        for task in asyncio.all_tasks(self.loop):
+            task.cancel()
+
+def wait_for_start(client, timeout=None, poll=None):
+    # blockiert bis zur START-Nachricht; liefert (cols, rows, seed, player, opponent) oder None
+    # (Verbindung beendet, Zeit abgelaufen oder poll() liefert False, z.B. Fenster geschlossen)
+    deadline = None if timeout is None else time.perf_counter() + timeout
+    while deadline is None or time.perf_counter() < deadline:
+        for msg_type, payload in client.poll(0.1):
+            if msg_type is None:
+                return None
+            if msg_type == MSG_START:
+                cols, rows, seed, player = _START.unpack_from(payload)
+                return cols, rows, seed, player, payload[_START.size:].decode("utf-8", "replace")
+        if poll is not None and not poll():
+            return None
+    return None
+
+class VersusSession:
+    # Spielseite eines Versus-Clients: Eingang (Garbage, Gegnerzustand) und Ausgang (Deltas,
+    # gelöschte Reihen, Game Over) einer laufenden Partie, dazu Tick- und Sync-Statistik
+    def __init__(self, client, start):
+        self.client = client
+        self.cols, self.rows, self.seed, self.player, opponent = start
+        self.sync = BoardSync(self.cols, self.rows)
+        self.opponent = OpponentBoard(self.cols, self.rows, opponent)
+        self.won = False
+        self.lost = False
+        self.steps = 0
+        self.syncs = 0
+        self.sync_time = 0.0
+        self.next_sync = 0.0
+        self.last_stats = time.perf_counter()
+        self.start = time.perf_counter()
+        # Ende der Partie (Statistik ohne Game-Over-Anzeige)
+        self.end = None
+
+    def new_engine(self, start_level=0):
+        # beide Spieler bekommen denselben Seed und damit dieselbe Steinfolge
+        engine = TetrisEngine(self.cols, self.rows, start_level, self.seed)
+        engine.clear_log = []
+        return engine
+
+    @property
+    def finished(self):
+        return self.won or self.lost
+
+    def receive(self):
+        # Aktionen für die eigene Engine (Garbage); aktualisiert das Gegnerboard
+        actions = []
+        for msg_type, payload in self.client.poll():
+            if msg_type is None:
+                # Server weg: wer noch spielt, gewinnt
+                self._finish(won=not self.lost)
+            elif msg_type == MSG_GARBAGE:
+                actions += [GARBAGE] * _COUNT.unpack(payload)[0]
+            elif self.opponent.apply(msg_type, payload) and self.opponent.game_over and not self.lost:
+                self._finish(won=True)
+        return actions
+
+    def _finish(self, won):
+        if self.end is None:
+            self.end = time.perf_counter()
+        if won:
+            self.won = True
+        else:
+            self.lost = True
+
+    def update(self, engine, steps):
+        # nach den Logikschritten eines Frames; schickt höchstens SYNC_HZ mal pro Sekunde
+        self.steps += steps
+        now = time.perf_counter()
+        # jede Löschung einzeln: der Server rechnet Garbage pro Löschung (zwei Doppel sind kein Tetris)
+        if engine.clear_log:
+            self.client.send([encode(MSG_LINES, _COUNT.pack(lines)) for lines in engine.clear_log])
+            engine.clear_log.clear()
+        if engine.game_over and not self.finished:
+            self._finish(won=False)
+        # ein Frame knapp vor dem Termin zählt schon (Frames und Sync laufen beide mit etwa 60 Hz)
+        if not self.lost and now < self.next_sync - 0.25 / SYNC_HZ:
+            return
+        # fester Takt; ein verspäteter Frame verschiebt ihn nicht
+        self.next_sync = max(self.next_sync + 1 / SYNC_HZ, now - 1 / SYNC_HZ)
+        messages = self.sync.messages(engine)
+        if self.lost:
+            messages.append(encode(MSG_GAME_OVER))
+        self.client.send(messages)
+        self.syncs += 1
+        self.sync_time += time.perf_counter() - now
+        if now - self.last_stats >= STATS_INTERVAL or self.lost:
+            self.send_stats()
+
+    def rates(self):
+        # (Logikschritte/s, Syncs/s, ms je Sync)
+        elapsed = max((self.end or time.perf_counter()) - self.start, 1e-9)
+        return self.steps / elapsed, self.syncs / elapsed, self.sync_time / max(self.syncs, 1) * 1000
+
+    def send_stats(self):
+        self.last_stats = time.perf_counter()
+        stats = self.client.stats
+        self.client.send([encode(MSG_STATS, _STATS.pack(*self.rates(), stats.bytes_out, stats.bytes_in))])
+
+class _Player:
+    def __init__(self, reader, writer, name):
+        self.reader = reader
+        self.writer = writer
+        self.name = name
+        self.opponent = None
+        self.matched = asyncio.Event()
+        self.stats = LinkStats()
+        # zuletzt gemeldete Client-Statistik (_STATS)
+        self.client_stats = None
+        self.lines = 0
+        self.garbage = 0
+
+    def send(self, data):
+        self.stats.sent(len(data))
+        self.writer.write(data)
+
+class VersusServer:
+    # Relay: paart Clients in Ankunftsreihenfolge, reicht Zustandsnachrichten an den Gegner weiter
+    # und macht aus gemeldeten gelöschten Reihen Garbage
+    def __init__(self, cols, rows, log=print):
+        self.cols = cols
+        self.rows = rows
+        self.log = log
+        self.waiting = None
+        self.players = []
+        self.reports = []
+
+    async def handle(self, reader, writer):
+        try:
+            msg_type, payload = await read_message(reader)
+        except (OSError, asyncio.IncompleteReadError):
+            writer.close()
+            return
+        if msg_type != MSG_HELLO:
+            writer.close()
+            return
+        player = _Player(reader, writer, payload.decode("utf-8", "replace") or "Player")
+        player.stats.received(_FRAME.size + len(payload))
+        self.players.append(player)
+        try:
+            await self._match(player)
+            await self._relay(player)
+        except (OSError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.players.remove(player)
+            if self.waiting is player:
+                self.waiting = None
+            opponent = player.opponent
+            if opponent is not None and not opponent.writer.is_closing():
+                # Verbindung weg: der Gegner gewinnt
+                opponent.send(encode(MSG_GAME_OVER))
+            self._report(player)
+            writer.close()
+
+    async def _match(self, player):
+        waiting = self.waiting
+        if waiting is None or waiting.writer.is_closing():
+            self.waiting = player
+            self.log(f"{player.name} waiting for an opponent")
+            # Warten gegen Verbindungsverlust: vor MSG_START sendet ein Client nichts, Daten oder EOF
+            # heißen Abbruch, und der Platz wird für den nächsten Client frei
+            matched = asyncio.ensure_future(player.matched.wait())
+            closed = asyncio.ensure_future(read_message(player.reader))
+            done, _ = await asyncio.wait((matched, closed), return_when=asyncio.FIRST_COMPLETED)
+            if matched in done:
+                # erst zu Ende abbrechen, sonst liest _relay parallel zum Leser
+                closed.cancel()
+                await asyncio.wait((closed,))
+                return
+            matched.cancel()
+            closed.result()
+            raise ConnectionResetError(f"{player.name} left while waiting")
+        self.waiting = None
+        seed = random.randrange(2 ** 32)
+        waiting.opponent, player.opponent = player, waiting
+        for number, (me, other) in enumerate(((waiting, player), (player, waiting))):
+            me.send(encode(MSG_START, _START.pack(self.cols, self.rows, seed, number) + other.name.encode("utf-8")))
+        waiting.matched.set()
+        self.log(f"match: {waiting.name} vs {player.name} on {self.cols}x{self.rows}, seed {seed}")
+
+    async def _relay(self, player):
+        while True:
+            msg_type, payload = await read_message(player.reader)
+            player.stats.received(_FRAME.size + len(payload))
+            opponent = player.opponent
+            if msg_type in RELAYED:
+                if not opponent.writer.is_closing():
+                    opponent.send(encode(msg_type, payload))
+            elif msg_type == MSG_LINES:
+                lines = _COUNT.unpack(payload)[0]
+                garbage = GARBAGE_FOR_LINES.get(lines, lines)
+                player.lines += lines
+                if garbage and not opponent.writer.is_closing():
+                    player.garbage += garbage
+                    opponent.send(encode(MSG_GARBAGE, _COUNT.pack(garbage)))
+            elif msg_type == MSG_STATS:
+                player.client_stats = _STATS.unpack(payload)
+
+    def _report(self, player):
+        line = f"{player.name}: {player.stats.summary()}, {player.lines} lines, {player.garbage} garbage sent"
+        if player.client_stats is not None:
+            steps, syncs, sync_ms, _, _ = player.client_stats
+            line += f", client {steps:.0f} steps/s, sync {syncs:.1f} Hz, {sync_ms:.3f} ms/sync"
+        self.reports.append((player.name, player.stats, player.client_stats))
+        self.log(line)
+
+    async def report_loop(self):
+        while True:
+            await asyncio.sleep(STATS_INTERVAL)
+            for player in list(self.players):
+                if player.opponent is not None:
+                    self.log(f"  {player.name}: {player.stats.summary()}")
+
+async def serve(host, port, cols, rows, ready=None, stop=None, log=print):
+    server = VersusServer(cols, rows, log)
+    listener = await asyncio.start_server(server.handle, host, port)
+    log(f"versus server on {', '.join(str(sock.getsockname()[:2]) for sock in listener.sockets)}, {cols}x{rows}")
+    reporter = asyncio.ensure_future(server.report_loop())
+    if ready is not None:
+        ready.set()
+    try:
+        async with listener:
+            if stop is None:
+                await listener.serve_forever()
+            else:
+                await stop.wait()
+    finally:
+        reporter.cancel()
+    return server
+
+def run_bot(host, port, name, seconds=60.0, lookahead=False):
+    # Client ohne Fenster: der Autoplayer spielt in Echtzeit (Logik in TICK_MS-Schritten, Sync mit SYNC_HZ)
+    client = VersusClient(host, port, name)
+    start = wait_for_start(client, timeout=30)
+    if start is None:
+        client.close()
+        return None
+    session = VersusSession(client, start)
+    engine = session.new_engine()
+    player = AutoPlayer(lookahead=lookahead)
+    ticks = TickAccumulator()
+    frame = 1 / SYNC_HZ
+    deadline = time.perf_counter() + seconds
+    next_frame = time.perf_counter()
+    last_ms = int(time.perf_counter() * 1000)
+    actions = []
+    while not session.finished and time.perf_counter() < deadline:
+        now = time.perf_counter()
+        now_ms = int(now * 1000)
+        count = ticks.advance(now_ms - last_ms)
+        last_ms = now_ms
+        actions += session.receive()
+        actions += player.actions(engine)
+        for _ in range(count):
+            engine.step(TICK_MS, actions)
+            actions = []
+            if engine.game_over:
+                break
+        session.update(engine, count)
+        next_frame = max(next_frame + frame, now)
+        delay = next_frame - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+    session.send_stats()
+    steps, syncs, sync_ms = session.rates()
+    result = {
+        'name': name,
+        'won': session.won,
+        'lost': session.lost,
+        'score': engine.score,
+        'lines': engine.lines,
+        'garbage': engine.garbage_rows,
+        'steps_per_s': steps,
+        'sync_hz': syncs,
+        'sync_ms': sync_ms,
+        'link': client.stats.summary(),
+    }
+    # Statistik noch abschicken lassen
+    time.sleep(0.2)
+    client.close()
+    return result
+
+def _bot_process(host, port, name, seconds, results):
+    results.put(run_bot(host, port, name, seconds))
+
+def selftest(cols, rows, seconds, port=0):
+    # Server und zwei Bot-Clients (eigene Prozesse) auf diesem Rechner
+    ready = threading.Event()
+    state = {}
+
+    def server_thread():
+        loop = asyncio.new_event_loop()
+        stop = asyncio.Event()
+        state['loop'], state['stop'] = loop, stop
+
+        async def main():
+            server = VersusServer(cols, rows)
+            listener = await asyncio.start_server(server.handle, "127.0.0.1", port)
+            state['port'] = listener.sockets[0].getsockname()[1]
+            state['server'] = server
+            ready.set()
+            async with listener:
+                await stop.wait()
+
+        loop.run_until_complete(main())
+        loop.close()
+
+    thread = threading.Thread(target=server_thread, daemon=True)
+    thread.start()
+    ready.wait()
+    results = multiprocessing.Queue()
+    bots = [multiprocessing.Process(target=_bot_process, args=("127.0.0.1", state['port'], name, seconds, results))
+            for name in ("bot-1", "bot-2")]
+    for bot in bots:
+        bot.start()
+    outcome = [results.get() for _ in bots]
+    for bot in bots:
+        bot.join()
+    state['loop'].call_soon_threadsafe(state['stop'].set)
+    thread.join(2.0)
+    ok = True
+    for result in outcome:
+        if result is None:
+            print("a bot did not get a match")
+            ok = False
+            continue
+        verdict = "won" if result['won'] else "lost" if result['lost'] else "time"
+        print(f"{result['name']}: {verdict}, score {result['score']}, lines {result['lines']}, "
+              f"garbage received {result['garbage']}, {result['steps_per_s']:.0f} steps/s, "
+              f"sync {result['sync_hz']:.1f} Hz ({result['sync_ms']:.3f} ms each), {result['link']}")
+        # Logik muss mit 1000 / TICK_MS Schritten pro Sekunde und der Sync mit SYNC_HZ mithalten
+        if result['steps_per_s'] < 0.9 * 1000 / TICK_MS or result['sync_hz'] < 0.9 * SYNC_HZ:
+            ok = False
+    return ok
+
+def main():
+    parser = argparse.ArgumentParser(description="Tetris versus mode: relay server, headless bots and a local self-test")
+    commands = parser.add_subparsers(dest="command", required=True)
+    server = commands.add_parser("server", help="run the relay server")
+    server.add_argument("--host", default="0.0.0.0", help="interface to listen on (default: all, for the LAN)")
+    server.add_argument("--port", type=int, default=DEFAULT_PORT)
+    server.add_argument("--size", type=parse_size, default=DEFAULT_SIZE, metavar="COLSxROWS")
+    bot = commands.add_parser("bot", help="connect an autoplayer client")
+    bot.add_argument("address", nargs="?", default=f"127.0.0.1:{DEFAULT_PORT}", help="HOST[:PORT]")
+    bot.add_argument("--name", default="bot")
+    bot.add_argument("--seconds", type=float, default=60.0)
+    test = commands.add_parser("selftest", help="server and two bot clients on this machine")
+    test.add_argument("--size", type=parse_size, default=(40, 40), metavar="COLSxROWS")
+    test.add_argument("--seconds", type=float, default=10.0)
+    args = parser.parse_args()
+
+    if args.command == "server":
+        try:
+            asyncio.run(serve(args.host, args.port, *args.size))
+        except KeyboardInterrupt:
+            pass
+    elif args.command == "bot":
+        host, port = parse_address(args.address)
+        result = run_bot(host, port, args.name, args.seconds)
+        if result is None:
+            print("no match")
+            sys.exit(1)
+        print(result)
+    else:
+        if not selftest(*args.size, args.seconds):
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()